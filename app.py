@@ -1,29 +1,55 @@
 # app.py
 # Orchestrates the app: Wi-Fi, polling (weather/CTA), theme updates,
 # screen rotation, and per-mode brightness.
+# Runs as cooperative asyncio tasks: one renderer plus independent pollers
+# that publish into the shared caches, so network I/O never stalls a frame.
 
-import time
 import gc
+import time
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
 
 from config import (
     ROWS, CTA_POLL_SECONDS,
     LAT, LON, TZ, WEATHER_POLL_SECONDS,
     WEATHER_SCREEN_SECONDS, CTA_SCREEN_SECONDS,
-    TRANSITION_MS, FRAME_DELAY, CTA_BRIGHTNESS_FACTOR,
-    DISPLAY_WIDTH,
+    TRANSITION_MS, FRAME_DELAY, CTA_BRIGHTNESS_FACTOR, CTA_TOGGLE_MS,
+    CTA_PAGE_MS, CTA_SCROLL_MS, CTA_ROW_ORDER, CTA_HIDE_EMPTY,
+    DISPLAY_WIDTH, DISPLAY_HEIGHT,
     MORNING_CTA_START_HOUR, MORNING_CTA_END_HOUR, MORNING_CTA_MULTIPLIER,
+    DEBUG_FRAME_ALLOC, WEATHER_MAX_STALE_SECONDS, CTA_MAX_STALE_SECONDS,
+    WIFI_DOT_RGB, FETCH_WORKER, WORKER_POLL_MS, STATUS_SERVER, STATUS_WAIT_MS,
 )
 
 # not in git
 from lib.secrets import WIFI_SSID, WIFI_PASSWORD, CTA_API_KEY
 import net
+import clock
+import heap
+import http_client
+import dns_cache
+import data_cache
+import poll_sched
+import snapshot
+import fetch_worker
+import spans
+import status_server
+import ntpclient
+import cta_api
+import weather_api
 import display as disp
 from display import make_pen
-from theme import update_theme, base_brightness, set_tz_offset
-from cta_api import fetch_predictions, extract_minutes_list
+from theme import update_theme, base_brightness, set_tz_offset, ms_until_check
+from cta_api import fetch_predictions_batch, extract_arrivals, live_minutes, civil_seconds
 from weather_api import fetch_weather
-from render_weather import draw_weather_static
-from render_cta import draw_cta_toggle
+from render_weather import draw_weather_static, weather_inputs
+from render_cta import (
+    draw_cta_toggle, cta_inputs, make_row, page_count, ROWS_PER_PAGE, ROW_MINUTES, ROW_STALE,
+)
+from frame_sched import FrameScheduler
 
 
 # Modes
@@ -35,32 +61,109 @@ next_mode = MODE_CTA
 transition_start_ms = None
 
 # Timers
-last_weather_poll_ms = -999_999
-last_cta_poll_ms = -999_999
 last_mode_switch_ms = 0
 
 # NEW: app-level throttle to ping NTP (sync is throttled inside net.sync_clock)
 APP_NTP_PING_MS = 60_000  # check once per minute
-_last_ntp_ping_ms = -999_999
+NTP_BOOT_RETRY_MS = 5_000  # until the first sync since boot, force one this often
+
+# Task cadences
+POLL_CHECK_MS = 1_000     # how often pollers re-check whether they are due
+FRAME_STATS_MS = 60_000   # how often frame skip / layout / pen cache stats are printed
 
 # Caches
+_WEATHER_BLANK = {"temp_f": None, "cond": "—", "tmax": None, "tmin": None}
 weather_cache = {
     "temp_f": None, "cond": "—", "tmax": None, "tmin": None,
     "is_day": 1, "sunrise": None, "sunset": None, "tz_offset_seconds": 0,
+    "stale": False,
 }
-cta_rows_data = [
-    {"prefix": "…", "pen": make_pen((255, 255, 255)), "minutes": ["…"]} for _ in range(3)
-]
+cta_rows_data = [make_row("…", disp.WHITE, ["…"]) for _ in ROWS]  # rows on screen, in order
+_cta_all_rows = cta_rows_data  # every configured row, in ROWS order (for status)
 
 # Precompute row pens once
 for r in ROWS:
     r["pen"] = make_pen(r["color"])
 
+# Stale-while-revalidate entries: the last good data is served (marked stale)
+# while refreshes fail, and dropped once past its max-stale window.
+weather_entry = data_cache.Entry("weather", WEATHER_POLL_SECONDS * 1000,
+                                 WEATHER_MAX_STALE_SECONDS * 1000)
+def _row_key(cfg):
+    # One cache entry per row: rows for the same stop and route can differ in
+    # direction (the fetch itself is still one per (stpid, rt))
+    return (str(cfg["stpid"]), str(cfg["rt"]), str(cfg.get("rtdir") or ""))
+
+
+cta_entries = {}  # (stpid, rt, rtdir) -> Entry holding (ticks_ms at response, arrivals)
+for r in ROWS:
+    cta_entries[_row_key(r)] = data_cache.Entry(
+        "cta", CTA_POLL_SECONDS * 1000, CTA_MAX_STALE_SECONDS * 1000)
+
+# Poll planning (interval, prefetch before the screen shows, error backoff)
+weather_poll = poll_sched.Source("weather", WEATHER_POLL_SECONDS * 1000)
+cta_poll = poll_sched.Source("cta", CTA_POLL_SECONDS * 1000)
+
+# Rows count down locally between polls; rebuilt when a minute token rolls
+_cta_rows_until = None  # ticks_ms of the next countdown change (None: static)
+cta_skew_s = None       # CTA server clock minus local clock, from the last poll
+_pending_cta = None     # (saved epoch, arrivals) from the snapshot, until the clock is set
+
+# FETCH_WORKER mode: kind -> fetch_worker.Mailbox from the worker to the render loop,
+# and the other way: _render_view() tuples for the pollers, status sections
+_boxes = None
+_view_box = None
+_status_box = None
+_view = None             # worker side: the last _render_view() taken
+_render_status = {}      # worker side: the last render-owned status sections
+
+# Profiling spans (spans.py; no-ops unless PROFILE_SPANS)
+_SP_FRAME = spans.span("frame")
+_SP_THEME = spans.span("theme")
+_SP_DRAW_WEATHER = spans.span("draw_weather")
+_SP_DRAW_CTA = spans.span("draw_cta")
+_SP_PUSH = spans.span("disp.update")
+_SP_GC = spans.span("gc")
+_SP_APPLY = spans.span("apply")
+_SP_FETCH_WEATHER = spans.span("fetch_weather")
+_SP_FETCH_CTA = spans.span("fetch_cta")
+_SP_NTP = spans.span("ntp")
+
+# Render pacing: FRAME_DELAY frames while animating, event-driven when static
+sched = FrameScheduler(int(FRAME_DELAY * 1000))
+
+# Pre-rendered screens; each is redrawn only when its visible inputs change
+_weather_screen = disp.Offscreen()
+_cta_screen = disp.Offscreen()
+# More rows than fit: the CTA screen pages, scrolling the next page in from
+# a second buffer (two pages drawn at most, however many rows there are)
+_cta_next = disp.Offscreen() if len(ROWS) > ROWS_PER_PAGE else None
+_cta_page = 0  # CTA page on screen (held through the slide out)
+
+# Screen durations (ms), precomputed so the render path does no float math
+_WEATHER_SCREEN_MS = WEATHER_SCREEN_SECONDS * 1000
+_CTA_SCREEN_MS = CTA_SCREEN_SECONDS * 1000
+_CTA_MORNING_SCREEN_MS = int(CTA_SCREEN_SECONDS * MORNING_CTA_MULTIPLIER) * 1000
+
+# Steady-mode brightness, recomputed only when base_brightness() changes
+_steady_base = None
+_steady_b = [0.0, 0.0]  # weather, cta
+
+# DEBUG_FRAME_ALLOC: bytes allocated by drawn / skipped frames in the stats window
+_alloc_drawn = [0, 0, 0]    # total, max, frames
+_alloc_skipped = [0, 0, 0]
+
 
 def _apply_mode_brightness(current_mode, upcoming_mode=None, t_progress=1.0):
     """Brightness curve: CTA slightly dimmer than Weather; tween during transitions."""
+    global _steady_base
     b_weather = base_brightness()
-    b_cta = b_weather * CTA_BRIGHTNESS_FACTOR
+    if b_weather is not _steady_base:
+        # Same float object back from theme means nothing to recompute
+        _steady_base = b_weather
+        _steady_b[0] = b_weather
+        _steady_b[1] = b_weather * CTA_BRIGHTNESS_FACTOR
+    b_cta = _steady_b[1]
 
     if current_mode == MODE_TRANSITION and upcoming_mode is not None:
         p = max(0.0, min(1.0, t_progress))
@@ -69,32 +172,104 @@ def _apply_mode_brightness(current_mode, upcoming_mode=None, t_progress=1.0):
         else:
             b = b_cta * (1.0 - p) + b_weather * p
     else:
-        b = b_weather if current_mode == MODE_WEATHER else b_cta
+        b = _steady_b[0] if current_mode == MODE_WEATHER else b_cta
 
     disp.set_brightness(b)
+    return b
 
 
-def _build_cta_rows_data():
-    rows = []
+async def _fetch_cta():
+    """
+    One batched getpredictions call for every row. Returns (results, or None
+    on failure; ticks_ms of the response; True if every row was answered).
+    """
+    results = {}
+    ok = True
+    if CTA_API_KEY:
+        try:
+            results = await spans.timed(_SP_FETCH_CTA, fetch_predictions_batch(
+                CTA_API_KEY, [(cfg["stpid"], cfg["rt"]) for cfg in ROWS]))
+        except Exception:
+            results = None
+        ok = results is not None and \
+            all(results.get((str(cfg["stpid"]), str(cfg["rt"]))) is not None for cfg in ROWS)
+    now_ms = time.ticks_ms()  # arrivals are relative to the response, not the request
+    return results, now_ms, ok
+
+
+def _apply_cta(results, now_ms, ok):
+    """Refresh every row's cache entry with absolute arrival times and rebuild the rows."""
+    global cta_skew_s, cta_rows_data
     for cfg in ROWS:
+        e = cta_entries[_row_key(cfg)]
         if not CTA_API_KEY:
             result = {"error": "no key"}
         else:
-            result = fetch_predictions(CTA_API_KEY, cfg["stpid"], cfg["rt"]) or {}
-        if not result or "error" in result:
+            result = results.get((str(cfg["stpid"]), str(cfg["rt"]))) if results else None
+        if result is None:
+            e.fail()  # network/parse failure: keep serving the last arrivals
+        elif "error" in result:
+            e.put((now_ms, ["NOA"]), now_ms)
+        else:
+            server_now = result.get("server_now")
+            arrivals = extract_arrivals(result.get("preds", []), server_now, cfg.get("rtdir"))
+            e.put((now_ms, arrivals), now_ms)
+            if server_now is not None:
+                tm = time.gmtime(time.time() + (weather_cache.get("tz_offset_seconds", 0) or 0))
+                cta_skew_s = server_now - civil_seconds(tm[0], tm[1], tm[2], tm[3], tm[4], tm[5])
+    cta_rows_data = _build_cta_rows_data(now_ms)
+    sched.notify()
+    if ok:
+        _maybe_snapshot()
+
+
+def _build_cta_rows_data(now_ms):
+    """
+    Rows with live countdowns from the cache entries (NOA once a row has
+    nothing usable), ordered by CTA_ROW_ORDER and without NOA rows if
+    CTA_HIDE_EMPTY (unless all are). Also schedules the next rebuild.
+    """
+    global _cta_rows_until, _cta_all_rows
+    rows = []
+    keys = []  # (soonest arrival s, config index): sort key per row
+    until = None
+    for i, cfg in enumerate(ROWS):
+        e = cta_entries[_row_key(cfg)]
+        v = e.get(now_ms)
+        soonest = None
+        if v is None:
             mins = ["NOA"]
         else:
-            mins = extract_minutes_list(result.get("preds", []), cfg.get("rtdir"))
-        rows.append({
-            "prefix": f"{cfg['rt']}{cfg['dir_label']}",
-            "pen": cfg["pen"],
-            "minutes": mins,
-        })
-    return rows
+            elapsed_ms = time.ticks_diff(now_ms, v[0])
+            mins, change = live_minutes(v[1], elapsed_ms)
+            if change is not None and (until is None or change < until):
+                until = change
+            soonest = _first_arrival_s(v[1], elapsed_ms // 1000)
+        rows.append(make_row(f"{cfg['rt']}{cfg['dir_label']}", cfg["pen"], mins, e.stale()))
+        keys.append((_NO_ARRIVAL_S if soonest is None else soonest, i))
+    _cta_rows_until = None if until is None else time.ticks_add(now_ms, until)
+    _cta_all_rows = rows
+
+    order = keys
+    if CTA_HIDE_EMPTY:
+        order = [k for k in keys if rows[k[1]][ROW_MINUTES] != ["NOA"]] or keys
+    if CTA_ROW_ORDER == "soonest":
+        order = sorted(order)
+    if order is keys:
+        return rows
+    return [rows[k[1]] for k in order]
+
+
+def _tick_cta_rows(now_ms):
+    global cta_rows_data
+    if _cta_rows_until is not None and time.ticks_diff(now_ms, _cta_rows_until) >= 0:
+        cta_rows_data = _build_cta_rows_data(now_ms)
 
 
 def _set_transition(nmode, now_ms):
-    global next_mode, mode, transition_start_ms
+    global next_mode, mode, transition_start_ms, _cta_page
+    if nmode == MODE_CTA:
+        _cta_page = 0
     next_mode = nmode
     mode = MODE_TRANSITION
     transition_start_ms = now_ms
@@ -107,124 +282,821 @@ def _enter_next_mode(now_ms):
     transition_start_ms = None
 
 
-def main():
-    global last_mode_switch_ms, last_weather_poll_ms, last_cta_poll_ms
-    global cta_rows_data, weather_cache, _last_ntp_ping_ms
+def _visible_in_ms(m, now_ms):
+    """0 while screen m is up (or sliding), else ms until its transition starts."""
+    if mode == m or mode == MODE_TRANSITION:
+        return 0
+    return max(0, _screen_ms(mode) - time.ticks_diff(now_ms, last_mode_switch_ms))
 
-    # Hook up status UI for Wi-Fi
-    net.set_status_callback(disp.status_screen)
 
-    # Connect Wi-Fi (reboots on hard timeout per net.ensure_wifi)
-    net.ensure_wifi(WIFI_SSID, WIFI_PASSWORD)
+def _in_morning():
+    hh = clock.hour(weather_cache.get("tz_offset_seconds", 0) or 0)
+    return MORNING_CTA_START_HOUR <= hh < MORNING_CTA_END_HOUR
+
+
+def _nearest_arrival_s(now_ms):
+    """Seconds until the soonest predicted bus over all rows (None if none)."""
+    best = None
+    for e in cta_entries.values():
+        v = e.get(now_ms)
+        if v is None:
+            continue
+        a = _first_arrival_s(v[1], time.ticks_diff(now_ms, v[0]) // 1000)
+        if a is not None and (best is None or a < best):
+            best = a
+    return best
+
+
+_NO_ARRIVAL_S = 1 << 24  # sorts rows without a predicted arrival last
+
+
+def _first_arrival_s(arrivals, elapsed_s):
+    """Seconds until the first predicted arrival still ahead (None if none)."""
+    for a in arrivals:
+        if isinstance(a, int) and a - elapsed_s >= 0:
+            return a - elapsed_s
+    return None
+
+
+def _publish(kind, *result):
+    """Hand a fetch result to its _apply_* function, via a mailbox in worker mode."""
+    if _boxes is not None:
+        _boxes[kind].post(result)
+    else:
+        t = spans.start()
+        _APPLY[kind](*result)
+        spans.stop(_SP_APPLY, t)
+
+
+def _render_view(now_ms):
+    """
+    What the pollers need from the render side, as of now_ms: ms until the
+    weather and CTA screens show, the nearest CTA arrival (s), morning window,
+    and whether frames are animating (pollers hold off).
+    """
+    return (now_ms, _visible_in_ms(MODE_WEATHER, now_ms), _visible_in_ms(MODE_CTA, now_ms),
+            _nearest_arrival_s(now_ms), _in_morning(), sched.animating)
+
+
+def _poll_view(now_ms):
+    """
+    _render_view() for the pollers. In worker mode it is never computed here:
+    the render loop posts it, and the latest one is aged to now_ms.
+    """
+    global _view
+    if _view_box is None:
+        return _render_view(now_ms)
+    v = _view_box.take()
+    if v is not None:
+        _view = v
+    t, w_in, c_in, nearest, morning, animating = _view
+    age = time.ticks_diff(now_ms, t)
+    if nearest is not None:
+        nearest = max(0, nearest - age // 1000)
+    return (now_ms, max(0, w_in - age), max(0, c_in - age), nearest, morning, animating)
+
+
+async def _view_since(t_ms):
+    # Worker mode: wait for a render view posted at or after t_ms (e.g. one
+    # that reflects a result just published)
+    global _view
+    if _view_box is None:
+        return
+    while True:
+        v = _view_box.take()
+        if v is not None:
+            _view = v
+        if time.ticks_diff(_view[0], t_ms) >= 0:
+            return
+        await asyncio.sleep(0.01)
 
-    # >>> NEW: force an initial NTP sync right after we know Wi-Fi is up
-    net.sync_clock(force=True)
-    _last_ntp_ping_ms = time.ticks_ms()
 
-    # Initial pulls
-    w = fetch_weather(LAT, LON, TZ)
+def _drain_mailboxes():
+    # Worker mode: apply what the worker published since the last frame, then
+    # tell the pollers what changed
+    applied = False
+    for kind, box in _boxes.items():
+        r = box.take()
+        if r is not None:
+            t = spans.start()
+            _APPLY[kind](*r)
+            spans.stop(_SP_APPLY, t)
+            applied = True
+    if applied:
+        _view_box.post(_render_view(time.ticks_ms()))
+
+
+def _apply_weather(w, now_ms):
+    """Weather fetch result (None on failure) into the cache."""
+    if w:
+        weather_entry.put(w, now_ms)
+        if w is not data_cache.NOT_MODIFIED:
+            weather_cache.update(w)
+            set_tz_offset(w.get("tz_offset_seconds", weather_cache.get("tz_offset_seconds", 0)))
+    else:
+        weather_entry.fail()
+    weather_cache["stale"] = weather_entry.stale()
+    # Force theme refresh after new weather (sunrise/sunset may change)
+    update_theme(weather_cache, make_pen, force=True)
+    sched.notify()
     if w:
+        _maybe_snapshot()
+
+
+def _apply_link(up):
+    # Offline dot over the screens while the Wi-Fi link is down
+    disp.set_overlay(None if up else make_pen(WIFI_DOT_RGB))
+    sched.notify()
+
+
+def _expire_weather(now_ms):
+    # Past max-stale: blank the values rather than show hours-old weather
+    if weather_entry.expire(now_ms):
+        weather_cache.update(_WEATHER_BLANK)
+        weather_cache["stale"] = False
+        sched.notify()
+
+
+async def _poll_weather_now():
+    now_ms = time.ticks_ms()
+    try:
+        w = await spans.timed(_SP_FETCH_WEATHER, fetch_weather(LAT, LON, TZ, weather_entry))
+    except Exception:
+        w = None
+    _publish("weather", w, now_ms)
+    weather_poll.done(time.ticks_ms(), bool(w), WEATHER_POLL_SECONDS * 1000, "base")
+
+
+async def _poll_cta_now():
+    results, now_ms, ok = await _fetch_cta()
+    sent_ms = time.ticks_ms()
+    _publish("cta", results, now_ms, ok)
+    await _view_since(sent_ms)  # the interval below needs the refreshed arrivals
+    now_ms = time.ticks_ms()
+    v = _poll_view(now_ms)
+    interval, reason = poll_sched.cta_interval_ms(v[3], v[4])
+    cta_poll.done(now_ms, ok, interval, reason)
+
+
+def _apply_ntp():
+    # The RTC was stepped: re-read it for the clock and the countdowns
+    clock.invalidate()
+    sched.notify()
+
+
+def _apply_status():
+    # Worker mode, render side: build the render-owned status sections
+    _status_box.post(_status_sections(_STATUS_RENDER))
+
+
+_APPLY = {"weather": _apply_weather, "cta": _apply_cta, "link": _apply_link,
+          "ntp": _apply_ntp, "status": _apply_status}
+
+
+def _snapshot_state(now_ms):
+    """snapshot.save() payload: usable weather and CTA arrivals as epoch seconds."""
+    t = int(time.time())
+    cta = {}
+    for key, e in cta_entries.items():
+        v = e.get(now_ms)
+        if v is not None:
+            base = t - time.ticks_diff(now_ms, v[0]) // 1000
+            cta[",".join(key)] = [a + base if isinstance(a, int) else a for a in v[1]]
+    return {
+        "t": t,
+        "tz": weather_cache.get("tz_offset_seconds", 0),
+        "weather": weather_entry.get(now_ms),
+        "cta": cta,
+    }
+
+
+def _maybe_snapshot():
+    # Absolute times are only meaningful once NTP has set the clock
+    now_ms = time.ticks_ms()
+    if snapshot.due(now_ms) and net.has_reasonable_time():
+        snapshot.save(_snapshot_state(now_ms), now_ms)
+
+
+def _restore_snapshot():
+    """Warm boot: load the saved data, marked stale; returns True if there was a snapshot."""
+    global _pending_cta
+    snap = snapshot.load()
+    if snap is None:
+        return False
+    now_ms = time.ticks_ms()
+    # Without a set clock the age is unknown; the data shows as stale either way
+    age_ms = max(0, int(time.time()) - snap["t"]) * 1000 if net.has_reasonable_time() else 0
+    w = snap.get("weather")
+    if w and weather_entry.restore(w, age_ms, now_ms):
         weather_cache.update(w)
-        set_tz_offset(w.get("tz_offset_seconds", 0))
+        weather_cache["stale"] = True
+    set_tz_offset(snap.get("tz", 0))
+    update_theme(weather_cache, make_pen, force=True)
+    _pending_cta = (snap["t"], snap.get("cta") or {})
+    _restore_cta(now_ms)
+    return True
 
-    # Theme pens (time + highlight) — computed & cached in theme
-    time_pen, hl_pen, _ = update_theme(weather_cache, make_pen, force=True)
 
-    # CTA rows
-    rows = _build_cta_rows_data()
-    if rows:
-        cta_rows_data = rows
+def _restore_cta(now_ms):
+    """Snapshot CTA arrivals back into countdowns, once the clock is set."""
+    global _pending_cta, cta_rows_data
+    if _pending_cta is None or not net.has_reasonable_time():
+        return
+    saved_t, cta = _pending_cta
+    _pending_cta = None
+    t = int(time.time())
+    for key, arrivals in cta.items():
+        e = cta_entries.get(tuple(key.split(",")))
+        if e is None or e.value is not None:
+            continue  # unknown row (or an older stpid,rt key), or already polled live
+        e.restore((now_ms, [a - t if isinstance(a, int) else a for a in arrivals]),
+                  max(0, t - saved_t) * 1000, now_ms)
+    cta_rows_data = _build_cta_rows_data(now_ms)
+    sched.notify()
 
-    last_mode_switch_ms = time.ticks_ms()
 
+def _expire_cta(now_ms):
+    global cta_rows_data
+    dropped = False
+    for e in cta_entries.values():
+        if e.expire(now_ms):
+            dropped = True
+    if dropped:
+        cta_rows_data = _build_cta_rows_data(now_ms)
+        sched.notify()
+
+
+def _screen_ms(m):
+    """How long screen m stays up (CTA lasts longer in the morning window)."""
+    if m == MODE_WEATHER:
+        # Weather uses its normal duration
+        return _WEATHER_SCREEN_MS
+    # CTA gets extended duration during morning commute window
+    ms = _CTA_MORNING_SCREEN_MS if _in_morning() else _CTA_SCREEN_MS
+    if _cta_next is not None:
+        # Long enough to show every page once
+        ms = max(ms, page_count(cta_rows_data) * CTA_PAGE_MS)
+    return ms
+
+
+def _cta_scroll_in_ms(now_ms):
+    """
+    0 while the CTA screen scrolls to its next page, else ms until the next
+    scroll starts; None if no scroll is coming on this visit to the screen.
+    """
+    if mode != MODE_CTA or _cta_next is None or page_count(cta_rows_data) == 1:
+        return None
+    k, into = divmod(time.ticks_diff(now_ms, last_mode_switch_ms), CTA_PAGE_MS)
+    if (k + 1) * CTA_PAGE_MS >= _screen_ms(MODE_CTA):
+        return None  # last page of the visit: the screen slides out instead
+    return max(0, CTA_PAGE_MS - CTA_SCROLL_MS - into)
+
+
+def _cta_paging(now_ms):
+    """
+    (page, scroll px) for the CTA screen: each page is up CTA_PAGE_MS, the
+    last CTA_SCROLL_MS of it sliding up to the next. Outside MODE_CTA the
+    page holds still.
+    """
+    global _cta_page
+    n = page_count(cta_rows_data)
+    if mode != MODE_CTA or n == 1:
+        _cta_page %= n
+        return _cta_page, 0
+    k, into = divmod(time.ticks_diff(now_ms, last_mode_switch_ms), CTA_PAGE_MS)
+    _cta_page = k % n
+    if _cta_scroll_in_ms(now_ms) != 0:
+        return _cta_page, 0
+    return _cta_page, (into - CTA_PAGE_MS + CTA_SCROLL_MS) * DISPLAY_HEIGHT // CTA_SCROLL_MS
+
+
+def _animating(now_ms):
+    """True while frames run at FRAME_DELAY pace (slide transition, page scroll)."""
+    return mode == MODE_TRANSITION or _cta_scroll_in_ms(now_ms) == 0
+
+
+def _rotate_screens(now_ms):
+    # Rotate screens
+    if mode != MODE_TRANSITION and \
+       time.ticks_diff(now_ms, last_mode_switch_ms) >= _screen_ms(mode):
+        _set_transition(MODE_CTA if mode == MODE_WEATHER else MODE_WEATHER, now_ms)
+
+
+def _ms_until_next_event(now_ms):
+    """
+    Idle wait for the render task: the earliest of the next mode switch, the
+    next theme recompute, and the next change visible on the current screen
+    (clock minute rollover for Weather, token toggle for CTA).
+    """
+    wait = _screen_ms(mode) - time.ticks_diff(now_ms, last_mode_switch_ms)
+    wait = min(wait, ms_until_check())
+    if mode == MODE_WEATHER:
+        wait = min(wait, clock.ms_until_next_minute(weather_cache.get("tz_offset_seconds", 0)))
+    else:
+        wait = min(wait, CTA_TOGGLE_MS - now_ms % CTA_TOGGLE_MS)
+        if _cta_rows_until is not None:
+            wait = min(wait, time.ticks_diff(_cta_rows_until, now_ms))
+        scroll = _cta_scroll_in_ms(now_ms)
+        if scroll is not None:
+            wait = min(wait, scroll)
+    return wait
+
+
+def _render_weather_screen(time_pen, hl_pen, tz_off, w_in):
+    if _weather_screen.begin(w_in):
+        t = spans.start()
+        try:
+            draw_weather_static(time_pen, hl_pen, tz_off, weather_cache, inputs=w_in)
+        finally:
+            _weather_screen.end(w_in)
+        spans.stop(_SP_DRAW_WEATHER, t)
+
+
+def _render_cta_screen(screen, page, now_ms, c_in):
+    key = (c_in, page)
+    if screen.begin(key):
+        t = spans.start()
+        try:
+            draw_cta_toggle(cta_rows_data, now_ms, page=page)
+        finally:
+            screen.end(key)
+        spans.stop(_SP_DRAW_CTA, t)
+
+
+def _show_cta_page(page, dy, now_ms, c_in):
+    # Page `page`, scrolled up dy px with the next page coming in below it
+    global _cta_screen, _cta_next
+    if _cta_next is not None and _cta_next.key == (c_in, page) and _cta_screen.key != _cta_next.key:
+        # The page that just scrolled in is already drawn: swap, don't redraw
+        _cta_screen, _cta_next = _cta_next, _cta_screen
+    _render_cta_screen(_cta_screen, page, now_ms, c_in)
+    if dy == 0:
+        disp.blit(_cta_screen)
+        return
+    _render_cta_screen(_cta_next, (page + 1) % page_count(cta_rows_data), now_ms, c_in)
+    disp.blit_v(_cta_screen, -dy)
+    disp.blit_v(_cta_next, DISPLAY_HEIGHT - dy)
+
+
+def _render_frame(now_ms):
+    """
+    Compose one frame from the pre-rendered screens and push it.
+    Returns False if it was skipped as unchanged.
+    """
+    _rotate_screens(now_ms)
+    _tick_cta_rows(now_ms)
+
+    # Keep theme fresh (throttled internally)
+    t = spans.start()
+    time_pen, hl_pen, _ = update_theme(weather_cache, make_pen)
+    spans.stop(_SP_THEME, t)
+    tz_off = weather_cache.get("tz_offset_seconds", 0)
+
+    # Draw + brightness
+    if mode == MODE_TRANSITION and transition_start_ms is not None:
+        t = time.ticks_diff(now_ms, transition_start_ms)
+        if t >= TRANSITION_MS:
+            _enter_next_mode(now_ms)
+            return _render_frame(now_ms)
+
+        # Brightness crossfade; swap frame halfway for a simple, pleasant handoff.
+        progress = t / float(TRANSITION_MS)
+        b = _apply_mode_brightness(MODE_TRANSITION, upcoming_mode=next_mode, t_progress=progress)
+
+        # Slide transition: current screen moves left, next slides in from right
+        # Compute pixel offsets
+        offset = int(DISPLAY_WIDTH * progress)
+        w_in = weather_inputs(time_pen, hl_pen, tz_off, weather_cache)
+        c_in = cta_inputs(cta_rows_data, now_ms)
+        if not disp.frame_changed(MODE_TRANSITION, next_mode, offset, b, w_in, c_in):
+            return False
+        _render_weather_screen(time_pen, hl_pen, tz_off, w_in)
+        _render_cta_screen(_cta_screen, _cta_paging(now_ms)[0], now_ms, c_in)
+        # Two offset blits; cost is independent of what is drawn on either screen
+        if next_mode == MODE_CTA:
+            # Weather -> CTA: weather shifted left, CTA coming in from right
+            disp.blit(_weather_screen, -offset)
+            disp.blit(_cta_screen, DISPLAY_WIDTH - offset)
+        else:
+            # CTA -> Weather
+            disp.blit(_cta_screen, -offset)
+            disp.blit(_weather_screen, DISPLAY_WIDTH - offset)
+    elif mode == MODE_WEATHER:
+        b = _apply_mode_brightness(MODE_WEATHER)
+        w_in = weather_inputs(time_pen, hl_pen, tz_off, weather_cache)
+        if not disp.frame_changed(MODE_WEATHER, b, w_in):
+            return False
+        _render_weather_screen(time_pen, hl_pen, tz_off, w_in)
+        disp.blit(_weather_screen)
+    else:
+        b = _apply_mode_brightness(MODE_CTA)
+        c_in = cta_inputs(cta_rows_data, now_ms)
+        page, dy = _cta_paging(now_ms)
+        if not disp.frame_changed(MODE_CTA, b, c_in, page, dy):
+            return False
+        _show_cta_page(page, dy, now_ms, c_in)
+
+    t = spans.start()
+    disp.update()
+    spans.stop(_SP_PUSH, t)
+    return True
+
+
+def _record_alloc(s, n):
+    s[0] += n
+    if n > s[1]:
+        s[1] = n
+    s[2] += 1
+
+
+def _print_alloc_stats():
+    for name, s in (("drawn", _alloc_drawn), ("skipped", _alloc_skipped)):
+        avg = s[0] // s[2] if s[2] else 0
+        print("frame alloc", name, "avg/max bytes", avg, s[1], "frames", s[2])
+        s[0] = s[1] = s[2] = 0
+
+
+def _age_s(entry, now_ms):
+    age = entry.age_ms(now_ms)
+    return None if age is None else age // 1000
+
+
+def _print_stats(now_ms, probe):
+    """Periodic log of frame, cache, network and poll stats; resets the windows."""
+    print("frames drawn", disp.frames_drawn, "skipped", disp.frames_skipped,
+          "skip rate", int(disp.skip_rate() * 100), "%")
+    print("layout hits/misses/measures/entries", disp.layout_stats())
+    print("pen hits/misses/entries", disp.pen_stats())
+    print("render duty", int(sched.duty_cycle() * 1000) / 10, "% wakes", sched.wakes,
+          "event wakes", sched.event_wakes,
+          "jitter avg/max ms", int(sched.jitter_avg_ms()), sched.jitter_max_ms)
+    print("gc collections", heap.collections)
+    print("snapshot", snapshot.stats())
+    if _boxes is not None:
+        print("worker mailboxes dropped", [(k, b.dropped) for k, b in _boxes.items()])
+    print("data age s: weather", _age_s(weather_entry, now_ms),
+          "cta", [_age_s(e, now_ms) for e in cta_entries.values()],
+          "cta skew s", cta_skew_s)
+    if probe is not None:
+        _print_alloc_stats()
+    if spans.ENABLED:
+        spans.dump()
+    disp.reset_frame_stats()
+    disp.reset_layout_stats()
+    sched.reset_stats()
+    if _boxes is None:
+        _print_net_stats(now_ms)
+
+
+def _print_net_stats(now_ms):
+    # Network-side part of the periodic log; printed by the worker's own
+    # _net_stats_task in worker mode, so its counters stay on one core
+    print("http", http_client.stats())
+    print("http phase ms histogram", http_client.HIST_BOUNDS_MS, http_client.histograms())
+    print("dns", dns_cache.stats())
+    print("wifi", net.link.stats())
+    for src in (weather_poll, cta_poll):
+        print("polls", src.name, "adaptive/fixed", src.stats(now_ms),
+              "next in s", src.wait_ms(now_ms) // 1000, src.reason)
+        src.reset_stats(now_ms)
+    http_client.reset_stats()
+    dns_cache.reset_stats()
+
+
+# ---- status_server sections: small dicts, built per scrape ----
+
+def _status_weather():
+    d = dict(weather_cache)
+    d["age_s"] = _age_s(weather_entry, time.ticks_ms())
+    return d
+
+
+def _status_cta():
+    now_ms = time.ticks_ms()
+    rows = []
+    ages = []
+    for cfg, row in zip(ROWS, _cta_all_rows):
+        age = _age_s(cta_entries[_row_key(cfg)], now_ms)
+        rows.append({"stpid": cfg["stpid"], "rt": cfg["rt"], "dir": cfg["dir_label"],
+                     "minutes": row[ROW_MINUTES], "stale": row[ROW_STALE], "age_s": age})
+        ages.append(age)
+    return {"rows": rows, "age_s": ages, "skew_s": cta_skew_s}
+
+
+def _status_polls():
+    now_ms = time.ticks_ms()
+    return {"weather": weather_api.stats.as_dict(), "cta": cta_api.stats.as_dict(),
+            "weather_next_s": weather_poll.wait_ms(now_ms) // 1000,
+            "cta_next_s": cta_poll.wait_ms(now_ms) // 1000,
+            "weather_failures": weather_poll.failures, "cta_failures": cta_poll.failures}
+
+
+def _status_heap():
+    try:
+        free, used = gc.mem_free(), gc.mem_alloc()
+    except AttributeError:
+        free = used = None
+    return {"free": free, "alloc": used, "collections": heap.collections}
+
+
+def _status_wifi():
+    d = net.link.stats()
+    d["connected"] = net.wlan.isconnected()
+    try:
+        d["rssi"] = net.wlan.status("rssi")
+    except Exception:
+        d["rssi"] = None
+    return d
+
+
+def _status_frames():
+    d = {"drawn": disp.frames_drawn, "skipped": disp.frames_skipped,
+         "duty_pct": int(sched.duty_cycle() * 1000) / 10,
+         "jitter_avg_ms": int(sched.jitter_avg_ms()), "jitter_max_ms": sched.jitter_max_ms}
+    if spans.ENABLED:
+        d["spans_us"] = spans.summary()
+    return d
+
+
+def _status_ntp():
+    d = dict(ntpclient.last) if ntpclient.last else {}
+    d["synced"] = net.has_reasonable_time()
+    return d
+
+
+def _status_net():
+    return {"http": http_client.stats(), "dns": dns_cache.stats(),
+            "status": status_server.stats()}
+
+
+# Counters with "window" semantics (frames, http, dns) reset with the periodic stats.
+# Render-owned sections are built by the render loop in worker mode.
+_STATUS_RENDER = (
+    ("weather", _status_weather), ("cta", _status_cta),
+    ("heap", _status_heap), ("frames", _status_frames),
+)
+_STATUS_NET = (
+    ("polls", _status_polls), ("wifi", _status_wifi),
+    ("ntp", _status_ntp), ("net", _status_net),
+)
+_STATUS_ORDER = ("weather", "cta", "polls", "heap", "wifi", "frames", "ntp", "net")
+
+
+def _status_sections(sections):
+    d = {}
+    for name, fn in sections:
+        d[name] = fn()
+    return d
+
+
+async def _status_snapshot():
+    """
+    status_server source: {section: dict}, yielding between sections. In
+    worker mode the render-owned ones are requested from the render loop
+    (built between frames) instead of read across cores.
+    """
+    global _render_status
+    d = {}
+    if _status_box is None:
+        for name, fn in _STATUS_RENDER:
+            d[name] = fn()
+            await asyncio.sleep(0)
+    else:
+        _status_box.take()  # drop an unclaimed reply
+        _publish("status")
+        for _ in range(STATUS_WAIT_MS // 10):
+            r = _status_box.take()
+            if r is not None:
+                _render_status = r
+                break
+            await asyncio.sleep(0.01)
+        d.update(_render_status)  # the last one, if the render loop was slow
+    for name, fn in _STATUS_NET:
+        d[name] = fn()
+        await asyncio.sleep(0)
+    return d
+
+
+def _render_step(now_ms, probe):
+    sched.begin_work()
+    t = spans.start()
+    if probe is not None:
+        probe.start(collect=False)
+        drawn = _render_frame(now_ms)
+        _record_alloc(_alloc_drawn if drawn else _alloc_skipped, probe.stop())
+    else:
+        drawn = _render_frame(now_ms)
+    if drawn:
+        spans.stop(_SP_FRAME, t)
+        t = spans.start()
+        if heap.maybe_collect():
+            spans.stop(_SP_GC, t)
+    sched.end_work()
+
+
+def _upkeep(now_ms):
+    # Render-side cache upkeep: snapshot rows waiting on the clock, max-stale expiry
+    if _pending_cta is not None:
+        _restore_cta(now_ms)
+    _expire_weather(now_ms)
+    _expire_cta(now_ms)
+
+
+async def _render_task():
+    stats_ms = time.ticks_ms()
+    probe = heap.Probe() if DEBUG_FRAME_ALLOC else None
     while True:
         now_ms = time.ticks_ms()
+        _render_step(now_ms, probe)
+        if time.ticks_diff(now_ms, stats_ms) >= FRAME_STATS_MS:
+            _print_stats(now_ms, probe)
+            stats_ms = now_ms
+        if _animating(time.ticks_ms()):
+            await sched.next_frame()
+        else:
+            await sched.idle(_ms_until_next_event(time.ticks_ms()))
 
-        # >>> NEW: Periodic NTP resync "ping"
-        # Call sync_clock() frequently; it will only sync if 6h elapsed (throttle inside net).
-        if time.ticks_diff(now_ms, _last_ntp_ping_ms) >= APP_NTP_PING_MS and net.wlan.isconnected():
+
+def _render_loop():
+    """
+    FETCH_WORKER mode: the render loop without asyncio (the event loop is the
+    worker's). Worker results are applied between frames; idle waits are
+    sliced so new results show within WORKER_POLL_MS.
+    """
+    stats_ms = upkeep_ms = time.ticks_ms()
+    probe = heap.Probe() if DEBUG_FRAME_ALLOC else None
+    frame_ms = int(FRAME_DELAY * 1000)
+    while True:
+        now_ms = time.ticks_ms()
+        _drain_mailboxes()
+        if time.ticks_diff(now_ms, upkeep_ms) >= POLL_CHECK_MS:
+            _upkeep(now_ms)
+            _view_box.post(_render_view(now_ms))
+            upkeep_ms = now_ms
+        _render_step(now_ms, probe)
+        if time.ticks_diff(now_ms, stats_ms) >= FRAME_STATS_MS:
+            _print_stats(now_ms, probe)
+            stats_ms = now_ms
+        animating = _animating(time.ticks_ms())
+        if animating != sched.animating:
+            sched.animating = animating
+            _view_box.post(_render_view(time.ticks_ms()))  # pollers hold off / resume
+        if animating:
+            wait = frame_ms
+        else:
+            wait = min(POLL_CHECK_MS, max(0, _ms_until_next_event(time.ticks_ms())))
+        target = time.ticks_add(now_ms, wait)
+        while True:
+            left = time.ticks_diff(target, time.ticks_ms())
+            if left <= 0 or _mail_waiting():
+                break
+            time.sleep_ms(min(left, WORKER_POLL_MS))
+
+
+def _mail_waiting():
+    for box in _boxes.values():
+        if box.ready():
+            return True
+    return False
+
+
+async def _upkeep_task():
+    while True:
+        _upkeep(time.ticks_ms())
+        await asyncio.sleep(POLL_CHECK_MS / 1000)
+
+
+async def _weather_task():
+    # Poll when weather_poll says so (interval, prefetch, backoff)
+    while True:
+        now_ms = time.ticks_ms()
+        v = _poll_view(now_ms)
+        if net.wlan.isconnected() and weather_poll.due(now_ms, v[1], v[5]):
+            await _poll_weather_now()
+        await asyncio.sleep(POLL_CHECK_MS / 1000)
+
+
+async def _cta_task():
+    while True:
+        now_ms = time.ticks_ms()
+        v = _poll_view(now_ms)
+        if net.wlan.isconnected() and cta_poll.due(now_ms, v[2], v[5]):
+            await _poll_cta_now()
+        await asyncio.sleep(POLL_CHECK_MS / 1000)
+
+
+async def _ntp_task():
+    # Periodic NTP resync "ping": sync_clock_async() only syncs once
+    # NTP_RESYNC_MS has elapsed (throttle inside net). Until a sync has
+    # succeeded since boot (warm boot with Wi-Fi already up, or a failed boot
+    # sync) it is forced, so restored arrivals aren't shown on an unsynced RTC.
+    while True:
+        force = ntpclient.last is None
+        await asyncio.sleep((NTP_BOOT_RETRY_MS if force else APP_NTP_PING_MS) / 1000)
+        if net.wlan.isconnected():
             try:
-                net.sync_clock(force=False)
+                await spans.timed(_SP_NTP, net.sync_clock_async(force=force))
             except Exception:
                 pass
-            _last_ntp_ping_ms = now_ms
-
-        # Rotate screens (CTA lasts longer in the morning window)
-        tz_off = weather_cache.get("tz_offset_seconds", 0) or 0
-        local_secs = time.time() + tz_off
-        hh = time.gmtime(local_secs)[3]
-
-        if mode == MODE_WEATHER:
-            # Weather uses its normal duration
-            if time.ticks_diff(now_ms, last_mode_switch_ms) >= WEATHER_SCREEN_SECONDS * 1000:
-                _set_transition(MODE_CTA, now_ms)
-
-        elif mode == MODE_CTA:
-            # CTA gets extended duration during morning commute window
-            cta_secs = CTA_SCREEN_SECONDS
-            if MORNING_CTA_START_HOUR <= hh < MORNING_CTA_END_HOUR:
-                cta_secs = int(CTA_SCREEN_SECONDS * MORNING_CTA_MULTIPLIER)
-            if time.ticks_diff(now_ms, last_mode_switch_ms) >= cta_secs * 1000:
-                _set_transition(MODE_WEATHER, now_ms)
-
-        # Poll WEATHER (only if showing Weather soon/recently)
-        if (mode in (MODE_WEATHER, MODE_TRANSITION) or next_mode == MODE_WEATHER) and \
-           time.ticks_diff(now_ms, last_weather_poll_ms) >= WEATHER_POLL_SECONDS * 1000:
-            if net.ensure_wifi(WIFI_SSID, WIFI_PASSWORD):
-                w = fetch_weather(LAT, LON, TZ)
-                if w:
-                    weather_cache.update(w)
-                    set_tz_offset(w.get("tz_offset_seconds", weather_cache.get("tz_offset_seconds", 0)))
-                # Force theme refresh after new weather (sunrise/sunset may change)
-                time_pen, hl_pen, _ = update_theme(weather_cache, make_pen, force=True)
-            last_weather_poll_ms = now_ms
-
-        # Poll CTA (only if showing CTA soon/recently)
-        if (mode in (MODE_CTA, MODE_TRANSITION) or next_mode == MODE_CTA) and \
-           time.ticks_diff(now_ms, last_cta_poll_ms) >= CTA_POLL_SECONDS * 1000:
-            if net.ensure_wifi(WIFI_SSID, WIFI_PASSWORD):
-                try:
-                    rows = _build_cta_rows_data()
-                    if rows:
-                        cta_rows_data = rows
-                except Exception:
-                    pass
-            last_cta_poll_ms = now_ms
-
-        # Keep theme fresh (throttled internally)
-        time_pen, hl_pen, _ = update_theme(weather_cache, make_pen)
-
-        # Draw + brightness
-        if mode == MODE_TRANSITION and transition_start_ms is not None:
-            t = time.ticks_diff(now_ms, transition_start_ms)
-            if t >= TRANSITION_MS:
-                _enter_next_mode(now_ms)
-            else:
-                # Brightness crossfade; swap frame halfway for a simple, pleasant handoff.
-                progress = t / float(TRANSITION_MS)
-                _apply_mode_brightness(MODE_TRANSITION, upcoming_mode=next_mode, t_progress=progress)
-
-                # Slide transition: current screen moves left, next slides in from right
-                # Compute pixel offsets
-                offset = int(DISPLAY_WIDTH * progress)
-                if next_mode == MODE_CTA:
-                    # Weather -> CTA
-                    # Draw current (weather) shifted left
-                    draw_weather_static(time_pen, hl_pen, weather_cache.get("tz_offset_seconds", 0), weather_cache, x_offset=-offset, clear_first=True)
-                    # Draw next (CTA) coming in from right
-                    draw_cta_toggle(cta_rows_data, now_ms, x_offset=(DISPLAY_WIDTH - offset), clear_first=False)
-                else:
-                    # CTA -> Weather
-                    draw_cta_toggle(cta_rows_data, now_ms, x_offset=-offset, clear_first=True)
-                    draw_weather_static(time_pen, hl_pen, weather_cache.get("tz_offset_seconds", 0), weather_cache, x_offset=(DISPLAY_WIDTH - offset), clear_first=False)
-        else:
-            if mode == MODE_WEATHER:
-                _apply_mode_brightness(MODE_WEATHER)
-                draw_weather_static(time_pen, hl_pen, weather_cache.get("tz_offset_seconds", 0), weather_cache)
+
+
+async def _wifi_task():
+    # Steps net.link; while it reconnects the screens keep running with a
+    # dot in the corner (it reboots only as a last resort)
+    was_up = net.link.up()
+    while True:
+        wait = net.link.step(time.ticks_ms())
+        up = net.link.up()
+        if up != was_up:
+            was_up = up
+            _publish("link", up)
+            if up:
+                asyncio.create_task(spans.timed(
+                    _SP_NTP, net.sync_clock_async(force=True, panic_if_bad=True)))
             else:
-                _apply_mode_brightness(MODE_CTA)
-                draw_cta_toggle(cta_rows_data, now_ms)
+                # Pooled sockets do not survive a link drop
+                http_client.close_all()
+        await asyncio.sleep(wait / 1000)
+
+
+async def _run(warm=False):
+    global last_mode_switch_ms
+
+    if not warm:
+        # Initial pulls (nothing to show yet, so these are awaited in order)
+        await _poll_weather_now()
+        await _poll_cta_now()
+
+    last_mode_switch_ms = time.ticks_ms()
+
+    asyncio.create_task(_wifi_task())
+    asyncio.create_task(_ntp_task())
+    asyncio.create_task(_weather_task())
+    asyncio.create_task(_cta_task())
+    asyncio.create_task(_upkeep_task())
+    if STATUS_SERVER:
+        asyncio.create_task(status_server.serve(_status_snapshot, _STATUS_ORDER))
+    await _render_task()
+
+
+async def _net_stats_task():
+    # Worker mode: the network half of the periodic log, on the worker
+    while True:
+        await asyncio.sleep(FRAME_STATS_MS / 1000)
+        _print_net_stats(time.ticks_ms())
+
+
+async def _worker_run():
+    # FETCH_WORKER mode, on the worker thread: the network tasks only. They
+    # hand results to the render loop through _publish() and read render
+    # state only as posted views (_poll_view, _status_snapshot).
+    asyncio.create_task(_wifi_task())
+    asyncio.create_task(_ntp_task())
+    asyncio.create_task(_weather_task())
+    asyncio.create_task(_net_stats_task())
+    if STATUS_SERVER:
+        asyncio.create_task(status_server.serve(_status_snapshot, _STATUS_ORDER))
+    await _cta_task()
+
+
+def _worker_main():
+    asyncio.run(_worker_run())
+
+
+def _start(warm=False):
+    global _boxes, _view_box, _status_box, _view, last_mode_switch_ms
+    if not FETCH_WORKER:
+        asyncio.run(_run(warm))
+        return
+    _boxes = {}
+    for kind in _APPLY:
+        _boxes[kind] = fetch_worker.Mailbox()
+    _view_box = fetch_worker.Mailbox()
+    _status_box = fetch_worker.Mailbox()
+    last_mode_switch_ms = time.ticks_ms()
+    _view = _render_view(last_mode_switch_ms)
+    fetch_worker.start(_worker_main)
+    _render_loop()
+
+
+def main():
+    # Hook up status UI for Wi-Fi
+    net.set_status_callback(disp.status_screen)
+    net.set_synced_callback(lambda: _publish("ntp"))
+
+    if _restore_snapshot():
+        # Warm boot: render the saved data at once; Wi-Fi, NTP and fresh
+        # polls come up behind it (net.link, _ntp_task, the pollers)
+        net.link.begin(WIFI_SSID, WIFI_PASSWORD)
+        _start(warm=True)
+        return
+
+    # Connect Wi-Fi (reboots on hard timeout per net.ensure_wifi)
+    net.ensure_wifi(WIFI_SSID, WIFI_PASSWORD)
+
+    # >>> NEW: force an initial NTP sync right after we know Wi-Fi is up
+    t = spans.start()
+    net.sync_clock(force=True)
+    spans.stop(_SP_NTP, t)
 
-        disp.update()
-        time.sleep(FRAME_DELAY)
-        gc.collect()
+    _start()
@@ -0,0 +1,49 @@
+# clock.py
+# Local wall clock for the render path. The RTC is read (and the "HH:MM"
+# string formatted) once per minute; in between, the minute is carried
+# forward on ticks_ms so per-frame queries allocate nothing. Until the RTC
+# has been set (warm boot before NTP) the time reads "--:--".
+
+import time
+
+_tz = None
+_next_ms = None   # ticks_ms of the next minute rollover
+_hh = 0
+_hhmm = "--:--"
+
+
+def _refresh(tz_offset_seconds):
+    global _tz, _next_ms, _hh, _hhmm
+    now = time.ticks_ms()
+    if _next_ms is not None and tz_offset_seconds == _tz and time.ticks_diff(now, _next_ms) < 0:
+        return
+    secs = time.time() + (tz_offset_seconds or 0)
+    tm = time.gmtime(secs)
+    _hh = tm[3]
+    _hhmm = "{:02d}:{:02d}".format(tm[3], tm[4]) if tm[0] >= 2024 else "--:--"  # 24h HH:MM
+    _next_ms = time.ticks_add(now, int((60 - secs % 60) * 1000))
+    _tz = tz_offset_seconds
+
+
+def hhmm(tz_offset_seconds):
+    """Local time as a cached "HH:MM" string."""
+    _refresh(tz_offset_seconds)
+    return _hhmm
+
+
+def hour(tz_offset_seconds):
+    """Local hour (0..23)."""
+    _refresh(tz_offset_seconds)
+    return _hh
+
+
+def ms_until_next_minute(tz_offset_seconds):
+    """Milliseconds until the displayed minute changes."""
+    _refresh(tz_offset_seconds)
+    return max(0, time.ticks_diff(_next_ms, time.ticks_ms()))
+
+
+def invalidate():
+    """Re-read the RTC on the next query (call after the clock was stepped)."""
+    global _next_ms
+    _next_ms = None
@@ -7,14 +7,74 @@ ROWS = [
     {"stpid": "4100", "rt": "73", "dir_label": "W", "rtdir": "Westbound",  "color": (255, 255, 0)},  # 73 Westbound
     {"stpid": "4065", "rt": "73", "dir_label": "E", "rtdir": "Eastbound",  "color": (255, 128, 0)},  # 73 Eastbound
 ]
-CTA_POLL_SECONDS = 30
+CTA_POLL_SECONDS = 120  # countdowns run locally from absolute arrival times between polls
 CTA_TOGGLE_MS = 2500  # toggle token every 2.5s
+# More ROWS than fit on the panel (3) are shown in pages
+CTA_PAGE_MS = 5000      # each page is up this long...
+CTA_SCROLL_MS = 600     # ...ending with a scroll up to the next page
+CTA_ROW_ORDER = "config"  # "config" (ROWS order) or "soonest" (nearest arrival first)
+CTA_HIDE_EMPTY = False    # drop rows with no upcoming buses (NOA) from the screen
 
 # ---- Weather (Open-Meteo; Chicago lat/lon) ----
 LAT, LON = 41.8781, -87.6298
 TZ = "America/Chicago"
 WEATHER_POLL_SECONDS = 600  # every 10 minutes
 
+# ---- HTTP responses ----
+HTTP_STREAM_JSON = True     # stream-parse only the needed fields (False: full json.loads, for comparison)
+HTTP_CHUNK_SIZE = 256       # socket read size for the streaming parser
+HTTP_KEEPALIVE = True       # reuse one pooled connection per API host (False: Connection: close)
+HTTP_KEEPALIVE_IDLE_MS = 120_000  # drop pooled connections idle longer than this...
+HTTP_KEEPALIVE_SLACK_MS = 30_000  # ...or than their API's poll interval plus this (keep_idle)
+HTTP_DRAIN_MAX = 2048       # unread body bytes worth draining to keep a connection
+HTTP_DEADLINE_MS = 10_000   # whole GET (DNS, connect + TLS, headers, body) must finish in this
+MEASURE_FETCH_HEAP = False  # debug: print heap allocated per fetch (pauses GC while fetching)
+
+# ---- DNS cache (dns_cache.py) ----
+DNS_TTL_MS = 30 * 60 * 1000   # reuse a resolved address this long
+DNS_NEG_TTL_MS = 30_000       # after a failed lookup, wait this long before asking again
+DNS_STALE_FALLBACK = True     # when the resolver fails, keep using the last good address
+
+# ---- Heap / GC policy (replaces gc.collect() after every frame/request) ----
+GC_MIN_FREE = 24 * 1024      # collect when free heap drops below this
+GC_ALLOC_BUDGET = 16 * 1024  # ...or once this much was allocated since the last collect
+DEBUG_FRAME_ALLOC = False    # debug: report bytes allocated per rendered/skipped frame
+
+# ---- Profiling spans (spans.py) ----
+PROFILE_SPANS = False        # time main loop stages and network calls into a ring buffer
+SPAN_RING_SIZE = 256         # samples kept (5 bytes each); stats cover this rolling window
+
+# ---- Data cache (stale-while-revalidate) ----
+WEATHER_MAX_STALE_SECONDS = 3 * 3600  # keep showing old weather this long past its poll interval
+CTA_MAX_STALE_SECONDS = 600           # ...and old CTA arrivals (still counted down locally)
+STALE_DOT_RGB = (120, 60, 0)          # corner dot shown while serving stale data
+
+# ---- Fetch worker (fetch_worker.py) ----
+FETCH_WORKER = False           # run Wi-Fi/NTP/HTTP on the second core; render loop on core 0
+WORKER_STACK_BYTES = 16 * 1024 # worker thread stack (TLS handshakes need room)
+WORKER_POLL_MS = 50            # idle render loop checks for worker results this often
+
+# ---- Status HTTP server (status_server.py) ----
+STATUS_SERVER = False          # serve GET /status (JSON) and /metrics (Prometheus) on the LAN
+STATUS_PORT = 8080
+STATUS_READ_TIMEOUT_MS = 2_000 # drop clients that don't send a request line in time
+STATUS_WAIT_MS = 1_000         # FETCH_WORKER: wait this long for the render loop's sections
+
+# ---- Warm boot snapshot (snapshot.py) ----
+SNAPSHOT_PATH = "snapshot.json"
+SNAPSHOT_MIN_INTERVAL_MS = 15 * 60 * 1000  # at most one flash write per 15 minutes
+
+# ---- Adaptive polling (poll_sched.py); CTA_POLL_SECONDS is the no-data default ----
+CTA_POLL_MIN_SECONDS = 45      # poll this often when a bus is CTA_NEAR_MIN minutes out or less
+CTA_POLL_MAX_SECONDS = 300     # ...and this often when the next bus is CTA_FAR_MIN+ minutes out
+CTA_NEAR_MIN = 5
+CTA_FAR_MIN = 20
+CTA_POLL_MORNING_FACTOR = 0.5  # shorter intervals inside the MORNING_CTA_* window
+POLL_PREFETCH_MS = 4_000       # poll a hidden screen's data this long before it shows
+RETRY_BACKOFF_MIN_MS = 5_000   # first retry after a failed poll (jittered 50-100%)
+RETRY_BACKOFF_MAX_MS = 300_000 # backoff doubles up to this
+POLL_LOG = True                # print each poll decision
+
 # ---- Screen rotation ----
 WEATHER_SCREEN_SECONDS = 15
 CTA_SCREEN_SECONDS = 10
@@ -29,10 +89,13 @@ FONT = "bitmap8"
 TEXT_SCALE = 1          # default scale for normal text (temps, CTA rows)
 CLOCK_TEXT_SCALE = 1    # bigger font just for the time (readable far away)
 LINE_HEIGHT = 9
-FRAME_DELAY = 0.04
+LAYOUT_CACHE_SIZE = 48  # cached text layouts (width/center/fit), roughly 100 B each
+PEN_CACHE_SIZE = 64     # shared pens keyed by RGB (theme blends, temp palette, rows)
+FRAME_DELAY = 0.04      # frame period while animating; static screens redraw only on change
 
 # ---- Dusk blending window (minutes around sunrise/sunset) ----
 DUSK_WINDOW_MIN = 45  # fade between day<->night across this window
+THEME_BLEND_STEPS = 24  # precomputed blend steps (2 pens each) in the theme timeline; < 128
 
 # ---- Per-mode brightness: CTA is dimmer than Weather ----
 CTA_BRIGHTNESS_FACTOR = 0.65   # CTA brightness = theme base * factor
@@ -52,7 +115,16 @@ THEMES = {
 }
 
 # ---- Theme refresh throttle ----
-THEME_CHECK_MS = 10000  # recompute blend about every 10s
+THEME_CHECK_MS = 10000  # look up the theme timeline about every 10s
+
+# ---- Wi-Fi link (net.WifiLink) ----
+WIFI_CHECK_MS = 5_000          # link check while connected
+WIFI_ATTEMPT_MS = 8_000        # give one connect attempt this long
+WIFI_ATTEMPTS_PER_RESET = 3    # failed attempts before the interface is reset
+WIFI_BACKOFF_MIN_MS = 1_000    # wait after a failed attempt, doubling...
+WIFI_BACKOFF_MAX_MS = 60_000   # ...up to this
+WIFI_REBOOT_AFTER_MS = 30 * 60 * 1000  # last resort: reboot after this long offline
+WIFI_DOT_RGB = (150, 0, 0)     # top-left dot shown over the screens while offline
 
 # ---- Spinner frames for Wi-Fi status ----
 SPINNER_FRAMES = ["|", "/", "-", "\\"]
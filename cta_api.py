@@ -1,63 +1,226 @@
  # cta_api.py
 # CTA Bus Tracker: fetch predictions for a stop/route and format minutes.
 
-import urequests as requests
-import gc
+import http_client
+import heap
+import jsonstream
+from config import HTTP_STREAM_JSON, HTTP_CHUNK_SIZE, CTA_POLL_MAX_SECONDS, HTTP_KEEPALIVE_SLACK_MS
 
 CTA_API_BASE = "http://www.ctabustracker.com/bustime/api/v2/getpredictions"
-_DEF_HEADERS = {"Connection": "close"}
+# Keep the connection across the longest adaptive interval (see poll_sched)
+http_client.keep_idle(CTA_API_BASE, CTA_POLL_MAX_SECONDS * 1000 + HTTP_KEEPALIVE_SLACK_MS)
+CTA_MAX_STOPS_PER_REQUEST = 10  # getpredictions accepts up to 10 stop ids per call
 
+stats = http_client.ApiStats()  # getpredictions request success/latency
 
-def fetch_predictions(api_key, stpid, rt):
+# Only these fields of each prediction / error entry are kept from the response
+_PRD = ("bustime-response", "prd")
+_ERR = ("bustime-response", "error")
+_RECORDS = {
+    _PRD: ("stpid", "rt", "rtdir", "prdctdn", "prdtm", "tmstmp", "dly"),
+    _ERR: ("stpid", "rt", "msg"),
+}
+
+
+async def fetch_predictions_batch(api_key, pairs):
     """
-    Fetch predictions for a given stop id (stpid) and route (rt).
+    Fetch predictions for many (stpid, rt) pairs with as few requests as possible.
+
+    Pairs are deduplicated, then stops are grouped into requests of up to
+    CTA_MAX_STOPS_PER_REQUEST ids, each carrying the routes wanted at those stops.
+    The combined "prd" list is split back per pair using each prediction's
+    own stpid/rt fields.
 
     Returns:
+      {(stpid, rt): result} where result is
       None on network/parse failure, or
-      {"error": "message"} if API returned an error, or
-      {"preds": [...]} where each item is a CTA prediction dict.
+      {"error": "message"} if the API returned an error for that pair, or
+      {"preds": [...], "server_now": s} where each item is a CTA prediction
+      dict (projected to the _RECORDS fields) and s is estimate_server_now().
+    """
+    wanted = []
+    for stpid, rt in pairs:
+        key = (str(stpid), str(rt))
+        if key not in wanted:
+            wanted.append(key)
+
+    stops = []
+    for stpid, _ in wanted:
+        if stpid not in stops:
+            stops.append(stpid)
+
+    results = {}
+    for i in range(0, len(stops), CTA_MAX_STOPS_PER_REQUEST):
+        chunk = stops[i:i + CTA_MAX_STOPS_PER_REQUEST]
+        chunk_pairs = [p for p in wanted if p[0] in chunk]
+        routes = []
+        for _, rt in chunk_pairs:
+            if rt not in routes:
+                routes.append(rt)
+        data = await _get_predictions(api_key, ",".join(chunk), ",".join(routes))
+        _split_batch(data, chunk_pairs, results)
+    return results
+
+
+def _split_batch(res, pairs, results):
+    """Distribute one combined getpredictions response over its (stpid, rt) pairs."""
+    if res is None:
+        for key in pairs:
+            results[key] = None
+        return
+
+    preds, errors = res
+    if isinstance(errors, dict):  # "error" may be one object or a list of them
+        errors = [errors]
+    now = estimate_server_now(preds)
+    for stpid, rt in pairs:
+        mine = [p for p in preds if str(p.get("stpid")) == stpid and str(p.get("rt")) == rt]
+        if mine:
+            results[(stpid, rt)] = {"preds": mine, "server_now": now}
+            continue
+        # CTA reports per-stop/per-route problems (e.g. "No service scheduled")
+        # as error entries tagged with stpid and/or rt; untagged ones cover the call.
+        errs = [
+            e for e in errors
+            if str(e.get("stpid", stpid)) == stpid and str(e.get("rt", rt)) == rt
+        ]
+        if errs:
+            results[(stpid, rt)] = {"error": _error_msg(errs)}
+        else:
+            results[(stpid, rt)] = {"preds": [], "server_now": now}
+
+
+async def _get_predictions(api_key, stpid, rt):
     """
+    GET getpredictions; stpid/rt may be comma-separated lists.
+    Returns (preds, errors) projected to the fields in _RECORDS, or None on failure.
+    """
+    return await stats.timed(heap.measure("cta", _get_projected(api_key, stpid, rt)))
+
+
+async def _get_projected(api_key, stpid, rt):
     url = f"{CTA_API_BASE}?key={api_key}&stpid={stpid}&rt={rt}&format=json"
     resp = None
     try:
-        resp = requests.get(url, headers=_DEF_HEADERS)
-        data = resp.json()
+        resp = await http_client.get(url)
+        ex = await jsonstream.read_json(resp, records=_RECORDS, stream=HTTP_STREAM_JSON,
+                                        chunk_size=HTTP_CHUNK_SIZE)
     except Exception:
-        _cleanup(resp)
         return None
     finally:
-        _cleanup(resp)
+        await _cleanup(resp)
+    if not ex.done:
+        return None  # truncated body
+    return ex.records[_PRD], ex.records[_ERR]
+
+
+def _error_msg(errors):
+    # Typically a list of { "msg": "..." }
+    try:
+        return errors[0].get("msg", "API error")
+    except Exception:
+        return "API error"
+
+
+def parse_ts(s):
+    """
+    CTA timestamp "YYYYMMDD HH:MM[:SS]" (Chicago local time) -> seconds on a
+    1970-based day count, for differences only. None if malformed.
+    """
+    try:
+        y, m, d = int(s[0:4]), int(s[4:6]), int(s[6:8])
+        hh, mm = int(s[9:11]), int(s[12:14])
+        ss = int(s[15:17]) if len(s) >= 17 else 0
+    except (TypeError, ValueError):
+        return None
+    return civil_seconds(y, m, d, hh, mm, ss)
+
+
+def civil_seconds(y, m, d, hh, mm, ss):
+    """Seconds since 1970-01-01 00:00 for a civil date/time (no time zone)."""
+    # Days from civil date (proleptic Gregorian, March-based year)
+    if m <= 2:
+        y -= 1
+    era = y // 400
+    yoe = y - era * 400
+    doy = (153 * (m - 3 if m > 2 else m + 9) + 2) // 5 + d - 1
+    days = era * 146097 + yoe * 365 + yoe // 4 - yoe // 100 + doy - 719468
+    return days * 86400 + hh * 3600 + mm * 60 + ss
 
-    bustime = data.get("bustime-response", {}) or {}
-    if "error" in bustime:
-        # Typically a list of { "msg": "..." }
-        try:
-            msg = bustime["error"][0].get("msg", "API error")
-        except Exception:
-            msg = "API error"
-        return {"error": msg}
-    return {"preds": bustime.get("prd", [])}
+
+def estimate_server_now(preds):
+    """
+    The server clock (parse_ts scale) when the response was built.
+    A numeric prdctdn is the floor of (prdtm - now) in minutes, so each one
+    puts now near prdtm - prdctdn*60 - 30s; they are averaged, and the
+    estimate is never earlier than the newest tmstmp (prediction time).
+    Good to about half a minute; None if nothing parses.
+    """
+    newest = None
+    total = n = 0
+    for p in preds:
+        ts = parse_ts(p.get("tmstmp"))
+        if ts is not None and (newest is None or ts > newest):
+            newest = ts
+        cd = p.get("prdctdn")
+        at = parse_ts(p.get("prdtm"))
+        if at is not None and isinstance(cd, str) and cd.isdigit():
+            total += at - int(cd) * 60 - 30
+            n += 1
+    est = total // n if n else newest
+    if est is not None and newest is not None and est < newest:
+        est = newest
+    return est
 
 
-def extract_minutes_list(preds, rtdir=None, max_items=5):
+def extract_arrivals(preds, server_now, rtdir=None, max_items=5):
     """
-    Extract a compact list of countdown tokens (strings) from predictions.
-    If rtdir is given, filter to that direction ("Southbound", "Westbound", etc).
+    Compact arrivals for local countdowns (see live_minutes): per prediction,
+    seconds from server_now until prdtm (int), or a fixed token ("DLY", or
+    prdctdn itself when prdtm cannot be used). If rtdir is given, only that
+    direction ("Southbound", "Westbound", etc); [] when nothing is predicted.
     """
-    if not preds:
-        return ["NOA"]
     if rtdir:
         preds = [p for p in preds if p.get("rtdir") == rtdir]
     out = []
     for p in preds[:max_items]:
-        cd = p.get("prdctdn", "?")
-        # CTA sends "DUE", "DLY", "??", or minute numbers as strings
-        if isinstance(cd, str) and cd.isdigit():
-            v = min(int(cd), 99)
-            out.append(str(v))
+        cd = str(p.get("prdctdn", "?")).upper()
+        at = parse_ts(p.get("prdtm"))
+        if cd == "DLY" or p.get("dly") is True:
+            out.append("DLY")
+        elif at is None or server_now is None:
+            out.append(cd)
+        else:
+            out.append(at - server_now)
+    return out
+
+
+def live_minutes(arrivals, elapsed_ms):
+    """
+    Countdown tokens for extract_arrivals() output elapsed_ms after the poll:
+    minute strings (capped at 99), "DUE" inside the last minute, fixed tokens
+    as-is; departed buses dropped a minute after arrival.
+    Returns (tokens, ms until any token changes, or None if none will).
+    """
+    out = []
+    change = None
+    for a in arrivals:
+        if isinstance(a, str):
+            out.append(a)
+            continue
+        rem = a * 1000 - elapsed_ms
+        if rem < -60000:
+            continue
+        if rem < 60000:
+            out.append("DUE")
+            nxt = rem + 60001
         else:
-            out.append(str(cd).upper())
-    return out or ["NOA"]
+            mins = rem // 60000
+            out.append(str(min(mins, 99)))
+            nxt = rem - mins * 60000 + 1
+        if change is None or nxt < change:
+            change = nxt
+    return out or ["NOA"], change
 
 
 def token3(s):
@@ -84,10 +247,11 @@ def token3(s):
     return (s + "   ")[:3]
 
 
-def _cleanup(resp):
+async def _cleanup(resp):
+    # Hands the connection back to the keep-alive pool when it is reusable
     try:
         if resp:
-            resp.close()
+            await resp.aclose()
     except Exception:
         pass
-    gc.collect()
+    heap.maybe_collect()
@@ -0,0 +1,91 @@
+# data_cache.py
+# Stale-while-revalidate cache entries for polled data (weather, CTA rows).
+# An entry is fresh for `ttl_ms` after a successful fetch; once expired it is
+# refreshed in the background, and while refreshes fail the last good value
+# keeps being served for up to `max_stale_ms` more (when to retry is up to
+# poll_sched). Entries also carry HTTP validators (ETag / Last-Modified) so
+# a refresh can be a conditional GET.
+
+import time
+
+# Returned by a fetch when the server answered 304 Not Modified
+NOT_MODIFIED = object()
+
+
+class Entry:
+    def __init__(self, name, ttl_ms, max_stale_ms):
+        self.name = name
+        self.ttl_ms = ttl_ms
+        self.max_stale_ms = max_stale_ms
+        self.value = None
+        self.fetched_ms = None   # ticks_ms of the last successful fetch
+        self.failures = 0        # consecutive failed refreshes
+        self.validators = {}     # "etag" / "last-modified" from the last 200
+
+    def age_ms(self, now_ms):
+        """Milliseconds since the last successful fetch (None if never)."""
+        if self.fetched_ms is None:
+            return None
+        return time.ticks_diff(now_ms, self.fetched_ms)
+
+    def usable(self, now_ms):
+        """True while the value may still be shown (fresh or within max-stale)."""
+        age = self.age_ms(now_ms)
+        return age is not None and age < self.ttl_ms + self.max_stale_ms
+
+    def stale(self):
+        """Serving an old value because the last refresh failed."""
+        return self.failures > 0 and self.value is not None
+
+    def get(self, now_ms):
+        return self.value if self.usable(now_ms) else None
+
+    def put(self, value, now_ms):
+        """Record a successful fetch (value may be NOT_MODIFIED)."""
+        if value is not NOT_MODIFIED:
+            self.value = value
+        self.fetched_ms = now_ms
+        self.failures = 0
+
+    def restore(self, value, age_ms, now_ms):
+        """
+        Load a value saved before a reboot; it is stale until a fetch succeeds.
+        Returns False (nothing loaded) if it is already past max-stale.
+        """
+        if age_ms >= self.ttl_ms + self.max_stale_ms:
+            return False
+        self.value = value
+        self.fetched_ms = time.ticks_add(now_ms, -age_ms)
+        self.failures = 1
+        return True
+
+    def fail(self):
+        """Record a failed refresh; the value stays up, marked stale."""
+        self.failures += 1
+
+    def expire(self, now_ms):
+        """Drop the value once it is past max-stale; returns True if dropped."""
+        if self.value is not None and not self.usable(now_ms):
+            self.value = None
+            self.validators = {}
+            return True
+        return False
+
+    def request_headers(self):
+        """Conditional GET headers for the stored validators (None if none)."""
+        v = self.validators
+        if not v or self.value is None:
+            return None
+        h = {}
+        if "etag" in v:
+            h["If-None-Match"] = v["etag"]
+        if "last-modified" in v:
+            h["If-Modified-Since"] = v["last-modified"]
+        return h
+
+    def store_validators(self, headers):
+        v = {}
+        for k in ("etag", "last-modified"):
+            if k in headers:
+                v[k] = headers[k]
+        self.validators = v
@@ -1,9 +1,18 @@
 # display.py
 # Thin wrapper around CosmicUnicorn + PicoGraphics with a few drawing helpers.
 
-from cosmic import CosmicUnicorn
-from picographics import PicoGraphics, DISPLAY_COSMIC_UNICORN
-from config import DISPLAY_WIDTH, DISPLAY_HEIGHT, FONT
+try:
+    from cosmic import CosmicUnicorn
+    from picographics import PicoGraphics, DISPLAY_COSMIC_UNICORN
+except ImportError:
+    # Off-device (CPython): simulated panel, see host/sim.py
+    from host.sim import CosmicUnicorn, PicoGraphics, DISPLAY_COSMIC_UNICORN
+from config import DISPLAY_WIDTH, DISPLAY_HEIGHT, FONT, LAYOUT_CACHE_SIZE, PEN_CACHE_SIZE
+
+try:
+    import framebuf
+except ImportError:
+    framebuf = None
 
 # Initialize hardware
 unicorn = CosmicUnicorn()
@@ -12,62 +21,313 @@ graphics = PicoGraphics(display=DISPLAY_COSMIC_UNICORN)
 graphics.set_font(FONT)
 unicorn.set_brightness(0.5)
 
+# Framebuffer layout (RGB888 pens are stored as 4 bytes per pixel)
+BYTES_PER_PIXEL = 4
+_STRIDE = DISPLAY_WIDTH * BYTES_PER_PIXEL
+_FB_BYTES = _STRIDE * DISPLAY_HEIGHT
+
+
+def _byte_view(buf):
+    # Rows of RGB888 pixels viewed as a GS8 framebuffer _STRIDE bytes wide,
+    # so framebuf can blit whole pixels at byte offsets x * BYTES_PER_PIXEL.
+    if framebuf is None:
+        return None
+    return framebuf.FrameBuffer(buf, _STRIDE, DISPLAY_HEIGHT, framebuf.GS8)
+
+
+def _buffer_of(gfx):
+    # PicoGraphics exposes its framebuffer through the buffer protocol; the
+    # host simulator (a plain Python class) exposes it as .buffer instead.
+    try:
+        return memoryview(gfx)
+    except TypeError:
+        return memoryview(gfx.buffer)
+
+
+_fb = _buffer_of(graphics)
+_fb_view = _byte_view(_fb)
+
+# Drawing helpers render into this target (the panel buffer or an Offscreen)
+_target = graphics
+
+# Text layout cache: (s, scale, font) -> [width, centered_x, {max_w: fit_s}, stamp]
+# so fit_text() is cached per (s, max_w) and a string measured at a few
+# widths (CTA tokens as the column changes) keeps them all.
+# Bounded LRU: on overflow the entry with the oldest stamp is evicted.
+# FONT is fixed for the process, so keys are just s (scale 1) or (s, scale),
+# which keeps the common lookup allocation-free.
+_layout = {}
+_layout_tick = 0
+layout_hits = 0
+layout_misses = 0
+measure_calls = 0
+
+# Pen registry: (r, g, b) -> [pen, stamp], bounded with the same oldest-stamp
+# eviction. RGB888 pens are plain values, so evicting only drops the mapping.
+_pens = {}
+_pen_tick = 0
+pen_hits = 0
+pen_misses = 0
+
 # Common pens
 WHITE = graphics.create_pen(255, 255, 255)
 BLACK = graphics.create_pen(0, 0, 0)
 
+# Frame diffing: the last drawn frame's visible inputs and the panel brightness
+_INVALID = object()
+_frame_key = [_INVALID] * 6
+_brightness = None
+_overlay = None  # pen of the status dot drawn over every frame (None: none)
+frames_drawn = 0
+frames_skipped = 0
+
 
 def make_pen(rgb):
-    """Create a PicoGraphics pen from an (r, g, b) tuple."""
-    r, g, b = rgb
-    return graphics.create_pen(r, g, b)
+    """Shared PicoGraphics pen for an (r, g, b) tuple, created on first use."""
+    global _pen_tick, pen_hits, pen_misses
+    _pen_tick += 1
+    e = _pens.get(rgb)
+    if e is None:
+        pen_misses += 1
+        if len(_pens) >= PEN_CACHE_SIZE:
+            oldest = None
+            for k, v in _pens.items():
+                if oldest is None or v[1] < oldest[1]:
+                    oldest = (k, v[1])
+            del _pens[oldest[0]]
+        r, g, b = rgb
+        e = [graphics.create_pen(r, g, b), 0]
+        _pens[rgb] = e
+    else:
+        pen_hits += 1
+    e[1] = _pen_tick
+    return e[0]
+
+
+def pen_stats():
+    """(hits, misses, entries) for the pen registry."""
+    return pen_hits, pen_misses, len(_pens)
 
 
 def set_brightness(b):
-    """Set panel brightness (0..1)."""
+    """Set panel brightness (0..1); no-op if unchanged."""
+    global _brightness
+    if b == _brightness:
+        return
     try:
         unicorn.set_brightness(b)
+        _brightness = b
     except Exception:
         pass
 
 
-def text_width(s, scale=1):
+def frame_changed(k0, k1=None, k2=None, k3=None, k4=None, k5=None):
+    """
+    Frame-state fingerprint check. The parts are comparable values covering
+    everything visible in the next frame (screen input tuples, token indices,
+    pens, offsets, brightness); passing them positionally keeps the check
+    allocation-free. Returns True if the frame must be drawn and pushed,
+    False if it would be identical to the last one and can be skipped.
+    """
+    global frames_drawn, frames_skipped
+    k = _frame_key
+    if k[0] == k0 and k[1] == k1 and k[2] == k2 and k[3] == k3 and k[4] == k4 and k[5] == k5:
+        frames_skipped += 1
+        return False
+    k[0], k[1], k[2] = k0, k1, k2
+    k[3], k[4], k[5] = k3, k4, k5
+    frames_drawn += 1
+    return True
+
+
+def set_overlay(pen):
+    """
+    Show a status dot in the top-left corner over every screen (pen=None
+    hides it). A change forces the next frame to redraw.
+    """
+    global _overlay
+    if pen != _overlay:
+        _overlay = pen
+        invalidate()
+
+
+def invalidate():
+    """Force the next frame to redraw (after something drew outside the diffing)."""
+    _frame_key[0] = _INVALID
+
+
+def skip_rate():
+    """Fraction of frames skipped by frame_changed() since the last reset."""
+    total = frames_drawn + frames_skipped
+    return frames_skipped / total if total else 0.0
+
+
+def reset_frame_stats():
+    global frames_drawn, frames_skipped
+    frames_drawn = frames_skipped = 0
+
+
+def _measure(s, scale):
     """Measure text width (fallback assumes 8px/char for bitmap8)."""
+    global measure_calls
+    measure_calls += 1
     try:
         return int(graphics.measure_text(s, scale))
     except Exception:
         return int(len(s) * 8 * scale)
 
 
+def _layout_entry(s, scale):
+    global _layout_tick, layout_hits, layout_misses
+    _layout_tick += 1
+    key = s if scale == 1 else (s, scale)
+    e = _layout.get(key)
+    if e is None:
+        layout_misses += 1
+        if len(_layout) >= LAYOUT_CACHE_SIZE:
+            oldest = None
+            for k, v in _layout.items():
+                if oldest is None or v[3] < oldest[1]:
+                    oldest = (k, v[3])
+            del _layout[oldest[0]]
+        w = _measure(s, scale)
+        e = [w, max(0, (DISPLAY_WIDTH - w) // 2), None, 0]
+        _layout[key] = e
+    else:
+        layout_hits += 1
+    e[3] = _layout_tick
+    return e
+
+
+def text_width(s, scale=1):
+    """Text width in pixels (cached)."""
+    return _layout_entry(s, scale)[0]
+
+
 def center_x(s, scale=1):
-    """X coordinate to center a string on the 32px-wide display."""
-    w = text_width(s, scale)
-    return max(0, (DISPLAY_WIDTH - w) // 2)
+    """X coordinate to center a string on the 32px-wide display (cached)."""
+    return _layout_entry(s, scale)[1]
+
+
+def fit_text(s, max_w, scale=1):
+    """Longest prefix of s that fits in max_w pixels (cached per string and max_w)."""
+    e = _layout_entry(s, scale)
+    fits = e[2]
+    if fits is None:
+        fits = e[2] = {}
+    fit = fits.get(max_w)
+    if fit is None:
+        fit = s
+        if e[0] > max_w:
+            fit = fit[:-1]
+            while fit and _measure(fit, scale) > max_w:
+                fit = fit[:-1]
+        fits[max_w] = fit
+    return fit
+
+
+def layout_stats():
+    """(hits, misses, measure_text calls, entries) for the layout cache."""
+    return layout_hits, layout_misses, measure_calls, len(_layout)
+
+
+def reset_layout_stats():
+    global layout_hits, layout_misses, measure_calls
+    layout_hits = layout_misses = measure_calls = 0
 
 
 def clear(pen=None):
     """Clear screen to pen (default BLACK)."""
-    graphics.set_pen(pen or BLACK)
-    graphics.clear()
+    _target.set_pen(pen or BLACK)
+    _target.clear()
 
 def draw_text_with_shadow(txt, x, y, scale, fg_pen, bg_pen):
     # Draw shadow (1px offset)
-    graphics.set_pen(bg_pen)
-    graphics.text(txt, x+1, y+1, 256, scale)
+    _target.set_pen(bg_pen)
+    _target.text(txt, x+1, y+1, 256, scale)
     # Draw main text
-    graphics.set_pen(fg_pen)
-    graphics.text(txt, x, y, 256, scale)
+    _target.set_pen(fg_pen)
+    _target.text(txt, x, y, 256, scale)
     
 
 def draw_text(s, x, y, scale=1, pen=None, wrap=256):
     """Draw text with optional pen and wrap width."""
     if pen is not None:
-        graphics.set_pen(pen)
-    graphics.text(s, x, y, wrap, scale)
+        _target.set_pen(pen)
+    _target.text(s, x, y, wrap, scale)
+
+
+def draw_pixel(x, y, pen):
+    _target.set_pen(pen)
+    _target.pixel(x, y)
+
+
+class Offscreen:
+    """
+    A screen-sized PicoGraphics with its own buffer. A screen is rendered
+    into it only when its inputs change; frames are then composed by blit().
+    """
+
+    def __init__(self):
+        self.buf = bytearray(_FB_BYTES)
+        self.gfx = PicoGraphics(display=DISPLAY_COSMIC_UNICORN, buffer=self.buf)
+        self.gfx.set_font(FONT)
+        self.view = _byte_view(self.buf)
+        self.key = None  # inputs last rendered into buf
+
+    def begin(self, key):
+        """
+        Point the drawing helpers at this buffer if it does not already hold
+        `key`; returns False (nothing to draw) otherwise. Pair with end().
+        """
+        global _target
+        if key == self.key:
+            return False
+        self.key = None
+        _target = self.gfx
+        return True
+
+    def end(self, key):
+        """Restore the panel as drawing target; the buffer now holds `key`."""
+        global _target
+        _target = graphics
+        self.key = key
+
+
+def blit(screen, x=0):
+    """Copy an Offscreen into the panel buffer shifted x pixels (clipped)."""
+    if x >= DISPLAY_WIDTH or x <= -DISPLAY_WIDTH:
+        return
+    if x == 0:
+        _fb[:] = screen.buf
+    elif _fb_view is not None:
+        _fb_view.blit(screen.view, x * BYTES_PER_PIXEL, 0)
+    else:
+        n = (DISPLAY_WIDTH - abs(x)) * BYTES_PER_PIXEL
+        sx = max(0, -x) * BYTES_PER_PIXEL
+        dx = max(0, x) * BYTES_PER_PIXEL
+        src = memoryview(screen.buf)
+        for row in range(0, _FB_BYTES, _STRIDE):
+            _fb[row + dx:row + dx + n] = src[row + sx:row + sx + n]
+
+
+def blit_v(screen, y):
+    """Copy an Offscreen into the panel buffer shifted y pixels down (clipped)."""
+    if y >= DISPLAY_HEIGHT or y <= -DISPLAY_HEIGHT:
+        return
+    src = memoryview(screen.buf)
+    n = _FB_BYTES - abs(y) * _STRIDE
+    if y >= 0:
+        _fb[_FB_BYTES - n:] = src[:n]
+    else:
+        _fb[:n] = src[_FB_BYTES - n:]
 
 
 def update():
-    """Flush the frame to the panel."""
+    """Flush the frame (plus the overlay dot, if any) to the panel."""
+    if _overlay is not None:
+        graphics.set_pen(_overlay)
+        graphics.pixel(0, 0)
     unicorn.update(graphics)
 
 
@@ -76,6 +336,7 @@ def status_screen(line1, line2="", scale=1):
     Minimal two-line status UI (used by net.ensure_wifi).
     Renders centered white text on black.
     """
+    invalidate()
     clear()
     graphics.set_pen(WHITE)
     y = 6 if line2 else 10
@@ -0,0 +1,102 @@
+# dns_cache.py
+# Resolver cache shared by every outbound connection (http_client, ntpclient).
+# getaddrinfo blocks on MicroPython and is often the slowest, least reliable
+# step of a fetch on a weak link, so answers are kept for DNS_TTL_MS (the
+# port's resolver does not report record TTLs). A failed lookup is cached for
+# DNS_NEG_TTL_MS; meanwhile, with DNS_STALE_FALLBACK, the last good address
+# of the host keeps being used.
+
+import socket
+import time
+
+from config import DNS_TTL_MS, DNS_NEG_TTL_MS, DNS_STALE_FALLBACK
+
+# host -> [ip or None, ticks_ms the entry expires, last good ip or None]
+_cache = {}
+
+# Metrics (see stats())
+lookups = 0
+hits = 0
+negative_hits = 0    # lookups answered by a cached failure
+fallbacks = 0        # resolver failed; last good address used
+failures = 0         # resolver calls that failed
+resolves = 0         # resolver calls made
+resolve_ms_total = 0
+resolve_ms_max = 0
+
+
+def _is_ip(host):
+    parts = host.split(".")
+    return len(parts) == 4 and all(p.isdigit() for p in parts)
+
+
+def _getaddrinfo(host):
+    global resolves, failures, resolve_ms_total, resolve_ms_max
+    t0 = time.ticks_ms()
+    try:
+        return socket.getaddrinfo(host, 80)[0][-1][0]
+    except Exception:
+        failures += 1
+        return None
+    finally:
+        ms = time.ticks_diff(time.ticks_ms(), t0)
+        resolves += 1
+        resolve_ms_total += ms
+        if ms > resolve_ms_max:
+            resolve_ms_max = ms
+
+
+def resolve(host):
+    """IP address string for host; raises OSError if it cannot be resolved."""
+    global lookups, hits, negative_hits, fallbacks
+    if _is_ip(host):
+        return host
+    lookups += 1
+    now = time.ticks_ms()
+    e = _cache.get(host)
+    if e is not None and time.ticks_diff(e[1], now) > 0:
+        if e[0] is not None:
+            hits += 1
+            return e[0]
+        negative_hits += 1
+    else:
+        ip = _getaddrinfo(host)
+        if ip is not None:
+            _cache[host] = [ip, time.ticks_add(now, DNS_TTL_MS), ip]
+            return ip
+        last_good = e[2] if e is not None else None
+        _cache[host] = e = [None, time.ticks_add(now, DNS_NEG_TTL_MS), last_good]
+    if DNS_STALE_FALLBACK and e[2] is not None:
+        fallbacks += 1
+        return e[2]
+    raise OSError("DNS lookup failed: " + host)
+
+
+def addr(host, port):
+    """(ip, port) socket address for host."""
+    return (resolve(host), port)
+
+
+def expire(host):
+    """Resolve host again on next use (e.g. its address stopped answering)."""
+    e = _cache.get(host)
+    if e is not None and e[0] is not None:
+        e[1] = time.ticks_ms()
+
+
+def stats():
+    """Lookup/resolver counters since reset_stats(), for the periodic log."""
+    return {
+        "lookups": lookups, "hits": hits, "negative_hits": negative_hits,
+        "fallbacks": fallbacks, "resolves": resolves, "failures": failures,
+        "hit_pct": hits * 100 // lookups if lookups else 0,
+        "resolve_ms_avg": resolve_ms_total // resolves if resolves else 0,
+        "resolve_ms_max": resolve_ms_max,
+    }
+
+
+def reset_stats():
+    global lookups, hits, negative_hits, fallbacks, failures, resolves
+    global resolve_ms_total, resolve_ms_max
+    lookups = hits = negative_hits = fallbacks = failures = resolves = 0
+    resolve_ms_total = resolve_ms_max = 0
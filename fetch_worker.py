@@ -0,0 +1,66 @@
+# fetch_worker.py
+# Optional fetch worker on a second thread (the RP2040's second core under
+# MicroPython's _thread; a threading.Thread on CPython, so the same code runs
+# on Linux). The worker runs the network side (Wi-Fi, NTP, weather, CTA) on
+# its own asyncio loop and hands compact results to the render loop through
+# Mailboxes; the render loop applies them between frames, so network work
+# never delays a frame.
+
+from config import WORKER_STACK_BYTES
+
+try:
+    import threading
+except ImportError:
+    threading = None
+    import _thread
+
+
+def _new_lock():
+    return threading.Lock() if threading is not None else _thread.allocate_lock()
+
+
+def start(fn):
+    """Run fn() on the worker thread / second core."""
+    if threading is not None:
+        threading.Thread(target=fn, name="fetch", daemon=True).start()
+    else:
+        _thread.stack_size(WORKER_STACK_BYTES)
+        _thread.start_new_thread(fn, ())
+
+
+class Mailbox:
+    """
+    Latest-value handoff from the worker to the render loop, double-buffered:
+    post() fills the back slot, then swaps it to the front under the lock;
+    take() returns the front value once (None if nothing new). A value posted
+    before the previous one was taken replaces it.
+    """
+
+    def __init__(self):
+        self._lock = _new_lock()
+        self._slots = [None, None]
+        self._front = 0
+        self._posted = 0
+        self._taken = 0
+        self.dropped = 0   # values replaced before the reader took them
+
+    def post(self, value):
+        back = 1 - self._front
+        self._slots[back] = value
+        with self._lock:
+            if self._posted != self._taken:
+                self.dropped += 1
+            self._front = back
+            self._posted += 1
+
+    def ready(self):
+        return self._posted != self._taken
+
+    def take(self):
+        if self._posted == self._taken:
+            return None
+        with self._lock:
+            self._taken = self._posted
+            v = self._slots[self._front]
+            self._slots[self._front] = None
+        return v
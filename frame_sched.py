@@ -0,0 +1,107 @@
+# frame_sched.py
+# Adaptive frame scheduler for the render task.
+# - Animating (transitions): deadline-based pacing at a target frame period;
+#   the sleep subtracts the measured work time instead of adding to it.
+# - Idle: sleep until the next known visible change (passed in by the caller)
+#   or until notify() reports new data, whichever comes first.
+# Tracks CPU duty cycle (render work vs wall time) and wake-up jitter.
+
+import time
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+# Integer-ms sleep on uasyncio (no float per frame); seconds on CPython
+_sleep_ms = getattr(asyncio, "sleep_ms", None) or (lambda ms: asyncio.sleep(ms / 1000))
+
+
+class FrameScheduler:
+    def __init__(self, frame_ms):
+        self.frame_ms = frame_ms
+        self._event = asyncio.Event()
+        self._deadline = None
+        self._work_start = None
+        self.animating = False  # pacing frames (transition/scroll); pollers hold off
+        self.reset_stats()
+
+    # ---- wake sources ----
+
+    def notify(self):
+        """Wake the renderer now (new data, theme change, overlay change...)."""
+        self._event.set()
+
+    # ---- render task side ----
+
+    def begin_work(self):
+        self._work_start = time.ticks_ms()
+
+    def end_work(self):
+        if self._work_start is not None:
+            self._busy_ms += time.ticks_diff(time.ticks_ms(), self._work_start)
+            self._work_start = None
+
+    async def next_frame(self):
+        """Sleep until the next frame deadline (animating)."""
+        self.animating = True
+        now = time.ticks_ms()
+        if self._deadline is None or time.ticks_diff(now, self._deadline) > self.frame_ms:
+            # First frame of an animation, or we fell more than a frame behind
+            self._deadline = now
+        self._deadline = time.ticks_add(self._deadline, self.frame_ms)
+        await self._sleep_until(self._deadline, wake_on_event=False)
+
+    async def idle(self, wait_ms):
+        """Sleep up to wait_ms (next scheduled visible change) or until notify()."""
+        self.animating = False
+        self._deadline = None
+        wait_ms = max(0, int(wait_ms))
+        await self._sleep_until(time.ticks_add(time.ticks_ms(), wait_ms), wake_on_event=True)
+
+    async def _sleep_until(self, target_ms, wake_on_event):
+        delay = time.ticks_diff(target_ms, time.ticks_ms())
+        timed_out = True
+        if wake_on_event:
+            if not self._event.is_set() and delay > 0:
+                try:
+                    await asyncio.wait_for(self._event.wait(), delay / 1000)
+                    timed_out = False
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                timed_out = not self._event.is_set()
+            self._event.clear()
+        elif delay > 0:
+            await _sleep_ms(delay)
+        else:
+            await asyncio.sleep(0)
+        self.wakes += 1
+        if timed_out:
+            late = time.ticks_diff(time.ticks_ms(), target_ms)
+            self._jitter_sum += abs(late)
+            self._jitter_n += 1
+            if abs(late) > self.jitter_max_ms:
+                self.jitter_max_ms = abs(late)
+        else:
+            self.event_wakes += 1
+
+    # ---- stats ----
+
+    def reset_stats(self):
+        self._window_start = time.ticks_ms()
+        self._busy_ms = 0
+        self._jitter_sum = 0
+        self._jitter_n = 0
+        self.jitter_max_ms = 0
+        self.wakes = 0
+        self.event_wakes = 0
+
+    def duty_cycle(self):
+        """Fraction of wall time spent in render work since reset_stats()."""
+        span = time.ticks_diff(time.ticks_ms(), self._window_start)
+        return self._busy_ms / span if span > 0 else 0.0
+
+    def jitter_avg_ms(self):
+        """Mean |actual - scheduled| wake time for timed wakes."""
+        return self._jitter_sum / self._jitter_n if self._jitter_n else 0.0
@@ -0,0 +1,91 @@
+# heap.py
+# Heap measurement helpers for comparing allocation cost of code paths.
+# On MicroPython, GC is paused for the measured block so gc.mem_alloc() only
+# grows: the delta is the bytes allocated, an upper bound on peak heap use.
+# On CPython, tracemalloc reports the true peak above the starting point.
+
+import gc
+
+from config import MEASURE_FETCH_HEAP, GC_MIN_FREE, GC_ALLOC_BUDGET
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+# name -> [last_bytes, max_bytes, samples]
+fetch_heap = {}
+
+# GC policy state
+_alloc_at_collect = 0
+collections = 0
+
+
+class Probe:
+    """start()/stop() around a block; stop() returns bytes allocated/peak."""
+
+    def start(self, collect=True):
+        if tracemalloc is not None:
+            tracemalloc.start()
+            tracemalloc.reset_peak()
+            self._base = tracemalloc.get_traced_memory()[0]
+        else:
+            if collect:
+                gc.collect()
+            gc.disable()
+            self._base = gc.mem_alloc()
+
+    def stop(self):
+        if tracemalloc is not None:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return peak - self._base
+        used = gc.mem_alloc() - self._base
+        gc.enable()
+        return used
+
+
+def maybe_collect(force=False):
+    """
+    Heap-threshold GC policy: collect only when free heap is below GC_MIN_FREE
+    or GC_ALLOC_BUDGET bytes were allocated since the last collection.
+    Returns True if it collected. No-op on CPython (no gc.mem_free).
+    """
+    global _alloc_at_collect, collections
+    try:
+        free = gc.mem_free()
+        alloc = gc.mem_alloc()
+    except AttributeError:
+        return False
+    if force or free < GC_MIN_FREE or alloc - _alloc_at_collect >= GC_ALLOC_BUDGET:
+        gc.collect()
+        _alloc_at_collect = gc.mem_alloc()
+        collections += 1
+        return True
+    return False
+
+
+def record(name, nbytes):
+    s = fetch_heap.get(name)
+    if s is None:
+        s = fetch_heap[name] = [0, 0, 0]
+    s[0] = nbytes
+    s[1] = max(s[1], nbytes)
+    s[2] += 1
+
+
+async def measure(name, aw):
+    """
+    Await aw, recording its heap cost under name when MEASURE_FETCH_HEAP is on.
+    Debug only: with GC paused, other tasks' allocations are counted too.
+    """
+    if not MEASURE_FETCH_HEAP:
+        return await aw
+    p = Probe()
+    p.start()
+    try:
+        return await aw
+    finally:
+        n = p.stop()
+        record(name, n)
+        print("heap", name, n, "bytes")
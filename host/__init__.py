@@ -0,0 +1,3 @@
+# host/__init__.py
+# Host-side (CPython) tooling: simulated panel and MicroPython shims.
+# Not synced to the device (see .micropico); nothing here runs on the Pico.
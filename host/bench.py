@@ -0,0 +1,322 @@
+# host/bench.py
+# Frame-time and allocation benchmark for the render pipeline, run on the
+# simulated panel (host/sim.py) with a virtual clock so every run renders the
+# same frames.
+#
+# Scenarios:
+#   weather_steady   weather screen at the frame rate across a minute rollover
+#   cta_toggle       CTA screen across several token toggles
+#   transition_w2c   weather -> CTA slide transitions
+#   transition_c2w   CTA -> weather slide transitions
+#   dusk_blend       weather screen through the sunset blend (theme recomputed
+#                    every frame, pens and brightness changing)
+#
+# Each scenario runs twice: once for latency (wall time per _render_frame),
+# once under tracemalloc for bytes allocated (heap.Probe, peak above start,
+# includes the simulator's small NumPy temporaries on drawn frames).
+#
+# Usage (repo root):
+#   python -m host.bench                      print a summary
+#   python -m host.bench --out before.json    ...and write JSON results
+#   python -m host.bench --compare before.json after.json [--fail-over 10]
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+from host import shims
+
+shims.install()
+
+import app  # noqa: E402
+import clock  # noqa: E402
+import display as disp  # noqa: E402
+import heap  # noqa: E402
+import theme  # noqa: E402
+from host import sim  # noqa: E402
+from config import TRANSITION_MS, THEME_CHECK_MS, CTA_TOGGLE_MS  # noqa: E402
+from render_cta import make_row  # noqa: E402
+
+FRAME_MS = int(app.FRAME_DELAY * 1000)
+
+# 2025-06-21 12:00:30 America/Chicago (CDT, UTC-5)
+TZ_OFFSET = -5 * 3600
+NOON_UTC = 1750525200 + 30
+SUNSET_LOCAL = "2025-06-21T20:29"
+
+# Metrics compared by --compare (lower is better for all of them)
+COMPARE_KEYS = ("p50_us", "p90_us", "p99_us", "max_us",
+                "draw_calls_per_frame", "pushes", "alloc_avg_bytes", "alloc_max_bytes")
+
+
+class VirtualClock:
+    """Drives time.ticks_ms()/time.time() so scenarios are reproducible."""
+
+    def __init__(self):
+        self.ms = 0
+        self.epoch = NOON_UTC
+
+    def set(self, epoch):
+        self.epoch = epoch
+        clock.invalidate()
+
+    def advance(self, ms):
+        self.ms += ms
+
+    def ticks_ms(self):
+        return self.ms & (shims.TICKS_PERIOD - 1)
+
+    def time(self):
+        return self.epoch + self.ms // 1000
+
+    def install(self):
+        self._saved = (time.ticks_ms, time.time)
+        time.ticks_ms = self.ticks_ms
+        time.time = self.time
+
+    def uninstall(self):
+        time.ticks_ms, time.time = self._saved
+
+
+vclock = VirtualClock()
+
+
+def _reset_app(mode, epoch, sunset=None):
+    """Known app state: data caches, theme, clock, screens and frame diff."""
+    vclock.ms = 0
+    vclock.set(epoch)
+    app.weather_cache.update({
+        "temp_f": 72.4, "cond": "Clear", "tmax": 81.0, "tmin": 64.0,
+        "is_day": 1, "sunrise": "2025-06-21T05:15", "sunset": sunset or SUNSET_LOCAL,
+        "tz_offset_seconds": TZ_OFFSET,
+    })
+    theme.set_tz_offset(TZ_OFFSET)
+    app.cta_rows_data = [
+        make_row(f"{r['rt']}{r['dir_label']}", r["pen"], mins)
+        for r, mins in zip(app.ROWS, (["DUE", "7", "19"], ["4", "16"], ["12"]))
+    ]
+    theme.update_theme(app.weather_cache, disp.make_pen, force=True)
+    app.mode = mode
+    app.next_mode = app.MODE_CTA if mode == app.MODE_WEATHER else app.MODE_WEATHER
+    app.transition_start_ms = None
+    app.last_mode_switch_ms = 0
+    app._weather_screen.key = None
+    app._cta_screen.key = None
+    disp.invalidate()
+
+
+# ---- scenarios: each calls step() once per frame ----
+
+def _steady(step, mode, frames):
+    _reset_app(mode, NOON_UTC)
+    for _ in range(frames):
+        app.last_mode_switch_ms = vclock.ticks_ms()  # pin the screen
+        step()
+        vclock.advance(FRAME_MS)
+
+
+def scenario_weather_steady(step, frames):
+    # 1500 frames at 40ms = 60s, so one minute rollover is included
+    _steady(step, app.MODE_WEATHER, frames)
+
+
+def scenario_cta_toggle(step, frames):
+    _steady(step, app.MODE_CTA, frames)
+
+
+def _transitions(step, frames, start_mode, target):
+    _reset_app(start_mode, NOON_UTC)
+    per = TRANSITION_MS // FRAME_MS + 1
+    for _ in range(max(1, frames // per)):
+        app.mode = start_mode
+        app._set_transition(target, vclock.ticks_ms())
+        while app.mode == app.MODE_TRANSITION:
+            step()
+            vclock.advance(FRAME_MS)
+        # Let the token index move on so the next pass sees fresh CTA input
+        vclock.advance(CTA_TOGGLE_MS)
+
+
+def scenario_transition_w2c(step, frames):
+    _transitions(step, frames, app.MODE_WEATHER, app.MODE_CTA)
+
+
+def scenario_transition_c2w(step, frames):
+    _transitions(step, frames, app.MODE_CTA, app.MODE_WEATHER)
+
+
+def scenario_dusk_blend(step, frames):
+    # Start 40 minutes before sunset; each frame is one theme check later
+    _reset_app(app.MODE_WEATHER, NOON_UTC + (8 * 3600 + 29 * 60 - 40 * 60) - 30)
+    for _ in range(frames):
+        app.last_mode_switch_ms = vclock.ticks_ms()
+        step()
+        vclock.advance(THEME_CHECK_MS)
+
+
+SCENARIOS = (
+    ("weather_steady", scenario_weather_steady, 1500),
+    ("cta_toggle", scenario_cta_toggle, 500),
+    ("transition_w2c", scenario_transition_w2c, 230),
+    ("transition_c2w", scenario_transition_c2w, 230),
+    ("dusk_blend", scenario_dusk_blend, 480),
+)
+
+
+# ---- runner ----
+
+def _percentile(sorted_vals, p):
+    if not sorted_vals:
+        return 0
+    k = max(0, min(len(sorted_vals) - 1, int(round(p / 100.0 * len(sorted_vals) + 0.5)) - 1))
+    return sorted_vals[k]
+
+
+def _time_pass(fn, frames):
+    lat = []
+    drawn = [0]
+    perf = time.perf_counter_ns
+
+    def step():
+        now = vclock.ticks_ms()
+        t0 = perf()
+        if app._render_frame(now):
+            drawn[0] += 1
+        lat.append((perf() - t0) // 1000)
+
+    sim.reset_stats()
+    fn(step, frames)
+    draw_calls, pixels, pushes, _ = sim.stats()
+    return lat, drawn[0], draw_calls, pixels, pushes
+
+
+def _alloc_pass(fn, frames):
+    sizes = []
+    probe = heap.Probe()
+
+    def step():
+        now = vclock.ticks_ms()
+        probe.start(collect=False)
+        app._render_frame(now)
+        sizes.append(probe.stop())
+
+    fn(step, frames)
+    return sizes
+
+
+def run_scenario(name, fn, frames):
+    lat, drawn, draw_calls, pixels, pushes = _time_pass(fn, frames)
+    sizes = _alloc_pass(fn, frames)
+    n = len(lat)
+    s = sorted(lat)
+    return {
+        "frames": n,
+        "drawn": drawn,
+        "skipped": n - drawn,
+        "p50_us": _percentile(s, 50),
+        "p90_us": _percentile(s, 90),
+        "p99_us": _percentile(s, 99),
+        "max_us": s[-1] if s else 0,
+        "mean_us": sum(lat) // n if n else 0,
+        "draw_calls": draw_calls,
+        "draw_calls_per_frame": round(draw_calls / n, 3) if n else 0,
+        "pixels_drawn": pixels,
+        "pushes": pushes,
+        "alloc_avg_bytes": sum(sizes) // len(sizes) if sizes else 0,
+        "alloc_max_bytes": max(sizes) if sizes else 0,
+    }
+
+
+def _git_rev():
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                             capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True).stdout.strip()
+        return rev + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(only=None, scale=1.0):
+    results = {}
+    vclock.install()
+    try:
+        for name, fn, frames in SCENARIOS:
+            if only and name not in only:
+                continue
+            results[name] = run_scenario(name, fn, max(1, int(frames * scale)))
+    finally:
+        vclock.uninstall()
+    return {
+        "commit": _git_rev(),
+        "python": platform.python_version(),
+        "frame_ms": FRAME_MS,
+        "scenarios": results,
+    }
+
+
+def print_summary(res):
+    print("commit", res["commit"], "python", res["python"])
+    print("%-16s %6s %6s %8s %8s %8s %8s %7s %6s %8s %8s" % (
+        "scenario", "frames", "drawn", "p50us", "p90us", "p99us", "maxus",
+        "calls/f", "push", "alloc~B", "allocMx"))
+    for name, r in res["scenarios"].items():
+        print("%-16s %6d %6d %8d %8d %8d %8d %7.2f %6d %8d %8d" % (
+            name, r["frames"], r["drawn"], r["p50_us"], r["p90_us"], r["p99_us"],
+            r["max_us"], r["draw_calls_per_frame"], r["pushes"],
+            r["alloc_avg_bytes"], r["alloc_max_bytes"]))
+
+
+def compare(old, new, fail_over=None):
+    """Print per-metric deltas; returns the number of regressions over fail_over %."""
+    print("old", old["commit"], "-> new", new["commit"])
+    regressions = 0
+    for name, n in new["scenarios"].items():
+        o = old["scenarios"].get(name)
+        if o is None:
+            print(name, "(new scenario)")
+            continue
+        print(name)
+        for k in COMPARE_KEYS:
+            a, b = o.get(k, 0), n.get(k, 0)
+            pct = (b - a) * 100.0 / a if a else (0.0 if b == a else float("inf"))
+            flag = ""
+            if fail_over is not None and pct > fail_over:
+                flag = "  REGRESSION"
+                regressions += 1
+            print("  %-22s %10s -> %-10s %+7.1f%%%s" % (k, a, b, pct, flag))
+    return regressions
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m host.bench")
+    ap.add_argument("--out", help="write JSON results to this file")
+    ap.add_argument("--only", nargs="*", help="scenario names to run")
+    ap.add_argument("--scale", type=float, default=1.0, help="frame count multiplier")
+    ap.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"),
+                    help="compare two result files instead of running")
+    ap.add_argument("--fail-over", type=float,
+                    help="with --compare: exit 1 if any metric regresses by more than this %%")
+    args = ap.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            old = json.load(f)
+        with open(args.compare[1]) as f:
+            new = json.load(f)
+        return 1 if compare(old, new, args.fail_over) else 0
+
+    res = run(args.only, args.scale)
+    print_summary(res)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(res, f, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
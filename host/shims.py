@@ -0,0 +1,128 @@
+# host/shims.py
+# Stand-ins for the MicroPython-only pieces the app imports, so app,
+# render_*, theme and display can be imported on CPython:
+# - time.ticks_ms / ticks_us / ticks_diff / ticks_add / sleep_ms
+# - network (a WLAN that reports connected), machine (RTC, reset)
+# - lib.secrets (from WIFI_SSID / WIFI_PASSWORD / CTA_API_KEY env vars)
+# Call install() before importing app modules.
+
+import os
+import sys
+import time
+import types
+
+# MicroPython ticks wrap at 2**30
+TICKS_PERIOD = 1 << 30
+_TICKS_MAX = TICKS_PERIOD - 1
+_TICKS_HALF = TICKS_PERIOD // 2
+
+
+def ticks_ms():
+    return int(time.monotonic() * 1000) & _TICKS_MAX
+
+
+def ticks_us():
+    return int(time.monotonic() * 1000000) & _TICKS_MAX
+
+
+def ticks_add(t, delta):
+    return (t + delta) & _TICKS_MAX
+
+
+def ticks_diff(t1, t2):
+    return ((t1 - t2 + _TICKS_HALF) & _TICKS_MAX) - _TICKS_HALF
+
+
+def sleep_ms(ms):
+    time.sleep(ms / 1000)
+
+
+class WLAN:
+    """Always-up station interface."""
+
+    def __init__(self, interface=0):
+        self._active = False
+        self.connected = True
+
+    def active(self, value=None):
+        if value is not None:
+            self._active = bool(value)
+        return self._active
+
+    def config(self, **kwargs):
+        pass
+
+    def connect(self, ssid=None, password=None):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def isconnected(self):
+        return self.connected
+
+    def status(self):
+        return 3 if self.connected else 0  # STAT_GOT_IP
+
+
+class RTC:
+    """Records the last datetime() set; the host clock is left alone."""
+
+    def __init__(self):
+        self.last_set = None
+
+    def datetime(self, dt=None):
+        if dt is not None:
+            self.last_set = dt
+            return None
+        tm = time.gmtime()
+        return (tm[0], tm[1], tm[2], tm[6], tm[3], tm[4], tm[5], 0)
+
+
+class ResetCalled(SystemExit):
+    pass
+
+
+def _reset():
+    raise ResetCalled("machine.reset()")
+
+
+def _module(name, **attrs):
+    m = types.ModuleType(name)
+    for k, v in attrs.items():
+        setattr(m, k, v)
+    return m
+
+
+def install():
+    """Register the shims (idempotent; real modules win if importable)."""
+    if not hasattr(time, "ticks_ms"):
+        time.ticks_ms = ticks_ms
+        time.ticks_us = ticks_us
+        time.ticks_add = ticks_add
+        time.ticks_diff = ticks_diff
+        time.sleep_ms = sleep_ms
+
+    try:
+        import network  # noqa: F401
+    except ImportError:
+        sys.modules["network"] = _module("network", WLAN=WLAN, STA_IF=0, AP_IF=1)
+
+    try:
+        import machine  # noqa: F401
+    except ImportError:
+        sys.modules["machine"] = _module("machine", RTC=RTC, reset=_reset)
+
+    try:
+        import lib.secrets  # noqa: F401
+    except ImportError:
+        secrets = _module(
+            "lib.secrets",
+            WIFI_SSID=os.environ.get("WIFI_SSID", ""),
+            WIFI_PASSWORD=os.environ.get("WIFI_PASSWORD", ""),
+            CTA_API_KEY=os.environ.get("CTA_API_KEY", ""),
+        )
+        lib = sys.modules.get("lib") or _module("lib")
+        lib.secrets = secrets
+        sys.modules["lib"] = lib
+        sys.modules["lib.secrets"] = secrets
@@ -0,0 +1,236 @@
+# host/sim.py
+# Simulated Cosmic Unicorn + PicoGraphics for running the render pipeline on
+# CPython. display.py falls back to this module when `cosmic`/`picographics`
+# are not importable.
+# - Same framebuffer layout as the device (RGB888 pens, 4 bytes per pixel),
+#   so Offscreen buffers and blit() work unchanged; frame() is the 32x32x3
+#   RGB NumPy view of it.
+# - Text uses bitmap8 metrics (8px tall, per-glyph advance); glyph shapes are
+#   deterministic placeholders, good for diffs and timing, not for looks.
+# - Counts draw calls and panel pushes for benchmarks (see reset_stats()).
+#
+# Run `python -m host.sim` from the repo root to render one frame of each
+# screen to the terminal.
+
+import numpy as np
+
+DISPLAY_COSMIC_UNICORN = 15
+WIDTH = 32
+HEIGHT = 32
+BYTES_PER_PIXEL = 4
+
+# bitmap8: glyph height and per-glyph width (most glyphs are 5px); one
+# column of letter spacing follows each glyph.
+FONT_HEIGHT = 8
+GLYPH_W = 5
+_GLYPH_WIDTHS = {
+    " ": 3, "!": 1, "'": 1, ",": 2, ".": 1, ":": 1, ";": 2, "|": 1,
+    "(": 3, ")": 3, "[": 3, "]": 3, "i": 1, "l": 2, "j": 3, "t": 4,
+    "1": 3, "°": 3, "-": 4, "/": 5, "…": 5,
+}
+
+# Counters (reset_stats() zeroes them)
+draw_calls = 0      # clear/pixel/rectangle/line/text calls
+pixels_drawn = 0    # panel pixels written by those calls
+pushes = 0          # CosmicUnicorn.update() calls
+bytes_pushed = 0
+
+
+def reset_stats():
+    global draw_calls, pixels_drawn, pushes, bytes_pushed
+    draw_calls = pixels_drawn = pushes = bytes_pushed = 0
+
+
+def stats():
+    """(draw_calls, pixels_drawn, pushes, bytes_pushed) since reset_stats()."""
+    return draw_calls, pixels_drawn, pushes, bytes_pushed
+
+
+def glyph_width(ch):
+    return _GLYPH_WIDTHS.get(ch, GLYPH_W)
+
+
+# (char, scale) -> bool mask of shape (FONT_HEIGHT*scale, width*scale)
+_glyphs = {}
+
+
+def _glyph(ch, scale):
+    key = (ch, scale)
+    m = _glyphs.get(key)
+    if m is None:
+        w = glyph_width(ch)
+        base = np.zeros((FONT_HEIGHT, w), dtype=bool)
+        if not ch.isspace():
+            # Placeholder shape: 7 rows of bits seeded by the code point
+            seed = (ord(ch) * 2654435761) & 0xFFFFFFFF
+            for col in range(w):
+                bits = (seed >> (col * 5)) | 0x41  # keep top/bottom rows lit
+                for row in range(7):
+                    base[row, col] = bool(bits & (1 << row))
+        m = np.repeat(np.repeat(base, scale, axis=0), scale, axis=1)
+        _glyphs[key] = m
+    return m
+
+
+class PicoGraphics:
+    """The PicoGraphics subset display.py uses, over a bytearray framebuffer."""
+
+    def __init__(self, display=DISPLAY_COSMIC_UNICORN, buffer=None, pen_type=None, rotate=0):
+        if buffer is None:
+            buffer = bytearray(WIDTH * HEIGHT * BYTES_PER_PIXEL)
+        self.buffer = buffer
+        # (row, col, B/G/R/X) over the same memory: RGB888 pens little-endian
+        self._px = np.frombuffer(buffer, dtype=np.uint8).reshape(HEIGHT, WIDTH, BYTES_PER_PIXEL)
+        self._color = np.zeros(BYTES_PER_PIXEL, dtype=np.uint8)
+        self._pen = 0
+        self.font = "bitmap8"
+
+    def get_bounds(self):
+        return WIDTH, HEIGHT
+
+    def frame(self):
+        """The framebuffer as a 32x32x3 RGB uint8 view (no copy)."""
+        return self._px[:, :, 2::-1]
+
+    def set_font(self, font):
+        self.font = font
+
+    def create_pen(self, r, g, b):
+        return ((r & 0xFF) << 16) | ((g & 0xFF) << 8) | (b & 0xFF)
+
+    def set_pen(self, pen):
+        self._pen = pen
+        c = self._color
+        c[0] = pen & 0xFF
+        c[1] = (pen >> 8) & 0xFF
+        c[2] = (pen >> 16) & 0xFF
+
+    def clear(self):
+        global draw_calls, pixels_drawn
+        draw_calls += 1
+        pixels_drawn += WIDTH * HEIGHT
+        self._px[:, :] = self._color
+
+    def pixel(self, x, y):
+        global draw_calls, pixels_drawn
+        draw_calls += 1
+        if 0 <= x < WIDTH and 0 <= y < HEIGHT:
+            pixels_drawn += 1
+            self._px[y, x] = self._color
+
+    def rectangle(self, x, y, w, h):
+        global draw_calls, pixels_drawn
+        draw_calls += 1
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(WIDTH, x + w), min(HEIGHT, y + h)
+        if x1 > x0 and y1 > y0:
+            pixels_drawn += (x1 - x0) * (y1 - y0)
+            self._px[y0:y1, x0:x1] = self._color
+
+    def line(self, x0, y0, x1, y1):
+        global draw_calls, pixels_drawn
+        draw_calls += 1
+        n = max(abs(x1 - x0), abs(y1 - y0)) + 1
+        for i in range(n):
+            x = x0 + (x1 - x0) * i // max(1, n - 1)
+            y = y0 + (y1 - y0) * i // max(1, n - 1)
+            if 0 <= x < WIDTH and 0 <= y < HEIGHT:
+                pixels_drawn += 1
+                self._px[y, x] = self._color
+
+    def measure_text(self, text, scale=1, spacing=1):
+        w = 0
+        for ch in text:
+            w += glyph_width(ch) + spacing
+        return w * scale
+
+    def text(self, text, x, y, wordwrap=256, scale=1, angle=0, spacing=1):
+        """Draw text left to right; wrapping and rotation are not simulated."""
+        global draw_calls, pixels_drawn
+        draw_calls += 1
+        scale = max(1, int(scale))
+        cx = int(x)
+        y = int(y)
+        for ch in text:
+            m = _glyph(ch, scale)
+            gh, gw = m.shape
+            if cx >= WIDTH:
+                break
+            x0, y0 = max(0, cx), max(0, y)
+            x1, y1 = min(WIDTH, cx + gw), min(HEIGHT, y + gh)
+            if x1 > x0 and y1 > y0:
+                sub = m[y0 - y:y1 - y, x0 - cx:x1 - cx]
+                self._px[y0:y1, x0:x1][sub] = self._color
+                pixels_drawn += int(sub.sum())
+            cx += (glyph_width(ch) + spacing) * scale
+
+
+class CosmicUnicorn:
+    """Panel stand-in: update() snapshots the frame and counts the push."""
+
+    WIDTH = WIDTH
+    HEIGHT = HEIGHT
+
+    def __init__(self):
+        self._brightness = 0.5
+        self._panel = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+
+    def set_brightness(self, value):
+        self._brightness = max(0.0, min(1.0, value))
+
+    def get_brightness(self):
+        return self._brightness
+
+    def adjust_brightness(self, delta):
+        self.set_brightness(self._brightness + delta)
+
+    def update(self, graphics):
+        global pushes, bytes_pushed
+        pushes += 1
+        bytes_pushed += WIDTH * HEIGHT * BYTES_PER_PIXEL
+        np.copyto(self._panel, graphics.frame())
+
+    def panel(self):
+        """Last pushed frame as 32x32x3 RGB, scaled by panel brightness."""
+        return (self._panel * self._brightness).astype(np.uint8)
+
+    def is_pressed(self, button):
+        return False
+
+
+def ansi(frame):
+    """Render a 32x32x3 frame as terminal truecolor half-blocks."""
+    out = []
+    for y in range(0, frame.shape[0], 2):
+        row = []
+        for x in range(frame.shape[1]):
+            t = frame[y, x]
+            b = frame[y + 1, x] if y + 1 < frame.shape[0] else (0, 0, 0)
+            row.append("\x1b[38;2;%d;%d;%dm\x1b[48;2;%d;%d;%dm▀" % (
+                t[0], t[1], t[2], b[0], b[1], b[2]))
+        out.append("".join(row) + "\x1b[0m")
+    return "\n".join(out)
+
+
+def main():
+    # Under `python -m` this file is __main__; display imports host.sim,
+    # so counters and the panel live on that module.
+    from host import shims, sim
+    shims.install()
+    import time
+    import app
+    import display as disp
+
+    now = time.ticks_ms()
+    for m in (app.MODE_WEATHER, app.MODE_CTA):
+        app.mode = m
+        app.last_mode_switch_ms = now
+        disp.invalidate()
+        app._render_frame(now)
+        print(sim.ansi(disp.unicorn.panel()))
+        print()
+    print("draw calls", sim.draw_calls, "pushes", sim.pushes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# test_jsonstream.py
+# The streaming Extractor must agree with json.loads + project() however the
+# body is split into chunks. Run on the host: python -m pytest host
+
+import json
+
+from jsonstream import Extractor, project
+
+WEATHER = (
+    b'{"latitude":41.88,"elevation":-1.5e2,"note":"a \\"quoted\\" \\\\ / \\/ \\b\\f\\n\\r\\t",'
+    b'"skip":{"deep":[1,[2,{"x":"]}\\"[{"}],{"y":null}],"s":"\\u00e9\\u4e2d"},'
+    b'"current":{"time":"2024-01-01T12:00","temperature_2m":-3.25,"weather_code":71,'
+    b'"is_day":true,"unit":"\\u00b0F"},'
+    b'"caf\\u00e9":"caf\xc3\xa9",'
+    b'"daily":{"time":["2024-01-01"],"temperature_2m_max":[12345678901,2],'
+    b'"temperature_2m_min":[-0.0,1E3],"sunrise":["2024-01-01T07:18"],'
+    b'"sunset":["2024-01-01T16:31"],"flag":false},"utc_offset_seconds":-21600}'
+)
+WEATHER_PATHS = (
+    ("utc_offset_seconds",), ("elevation",), ("note",), ("current", "temperature_2m"),
+    ("current", "weather_code"), ("current", "is_day"), ("current", "unit"),
+    ("daily", "temperature_2m_max", 0), ("daily", "temperature_2m_min", 0),
+    ("daily", "temperature_2m_min", 1), ("daily", "sunrise", 0), ("daily", "sunset", 0),
+    ("café",), ("skip", "s"), ("missing", "path"),
+)
+
+_PRD = ("bustime-response", "prd")
+_ERR = ("bustime-response", "error")
+RECORDS = {
+    _PRD: ("stpid", "rt", "rtdir", "prdctdn", "prdtm"),
+    _ERR: ("stpid", "rt", "msg"),
+}
+CTA_LIST = (
+    b'{"bustime-response":{"prd":[{"tmstmp":"20240101 12:00","stpid":"8844","rt":"50",'
+    b'"rtdir":"Southbound","prdctdn":"DUE","prdtm":"20240101 12:01","extra":{"a":[1,2]}},'
+    b'{"stpid":"4100","rt":"73","rtdir":"West\\u0062ound","prdctdn":"12","dly":false}],'
+    b'"error":[{"stpid":"4065","rt":"73","msg":"No service \\"scheduled\\""},{"msg":"x"}]}}'
+)
+CTA_OBJECT = b'{"bustime-response":{"error":{"msg":"No arrival times","stpid":"1"}}}'
+CTA_EMPTY = b'{"bustime-response":{"prd":[],"error":[]}}'
+
+
+def _feed(doc, size, paths=(), records=None):
+    ex = Extractor(paths, records)
+    for i in range(0, len(doc), size):
+        if ex.feed(doc[i:i + size]):
+            break
+    return ex
+
+
+def _check(doc, paths=(), records=None):
+    want = project(json.loads(doc), paths, records)
+    for size in range(1, len(doc) + 1):
+        ex = _feed(doc, size, paths, records)
+        assert ex.done, size
+        assert ex.values == want.values, size
+        assert ex.records == want.records, size
+
+
+def test_values_match_full_parse():
+    _check(WEATHER, WEATHER_PATHS)
+
+
+def test_records_array_and_object():
+    _check(CTA_LIST, records=RECORDS)
+    _check(CTA_OBJECT, records=RECORDS)
+    _check(CTA_EMPTY, records=RECORDS)
+
+
+def test_error_object_is_one_record():
+    ex = _feed(CTA_OBJECT, 7, records=RECORDS)
+    assert ex.records[_ERR] == [{"msg": "No arrival times", "stpid": "1"}]
+    assert ex.records[_PRD] == []
+
+
+def test_surrogate_escape_is_replaced():
+    ex = _feed(b'{"s":"\\ud83d\\ude00!"}', 1, (("s",),))
+    assert ex.values[("s",)] == "??!"
+
+
+def _done_at(doc, paths=(), records=None):
+    # Bytes needed before the Extractor has everything (it stops there)
+    ex = Extractor(paths, records)
+    for end in range(1, len(doc) + 1):
+        if ex.feed(doc[end - 1:end]):
+            return end
+    return None
+
+
+def test_truncated_input_is_not_done():
+    paths = WEATHER_PATHS[:-1]
+    for cut in range(_done_at(WEATHER, paths)):
+        for size in (1, 3, 64):
+            assert not _feed(WEATHER[:cut], size, paths).done, (cut, size)
+    for doc in (CTA_LIST, CTA_OBJECT):
+        for cut in range(_done_at(doc, records=RECORDS)):
+            assert not _feed(doc[:cut], 5, records=RECORDS).done, cut
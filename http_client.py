@@ -0,0 +1,490 @@
+# http_client.py
+# Minimal asyncio HTTP GET client shared by the API modules.
+# Runs on uasyncio (device) and asyncio (CPython), so a slow server or TLS
+# handshake only suspends the calling task instead of the whole app.
+#
+# Connections are HTTP/1.1 keep-alive and pooled per (host, port, tls): a
+# finished response hands its socket back with aclose(), and the next GET to
+# that host skips DNS, TCP connect and the TLS handshake. A pooled socket the
+# server has since closed is detected on use and replaced transparently.
+# A pooled socket is kept HTTP_KEEPALIVE_IDLE_MS unless its API sets a
+# longer limit with keep_idle() (its poll interval), since reuse only pays
+# off if the socket survives until the next poll; whether the server keeps
+# it open that long shows up as reused vs stale in stats().
+# (Neither uasyncio nor asyncio streams accept a saved TLS session for a new
+# connection, so reuse comes from keeping the connection itself open.)
+# Host names are resolved through dns_cache.
+#
+# Every GET carries one deadline (HTTP_DEADLINE_MS) covering DNS, connect
+# (with the TLS handshake), headers and the body reads. When it passes, the
+# pending read is cancelled, the socket is closed rather than pooled and
+# DeadlineExceeded names the phase that ran out. Per-phase latencies are
+# kept as histograms (see histograms()).
+
+import json
+import time
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+import dns_cache
+from config import HTTP_KEEPALIVE, HTTP_KEEPALIVE_IDLE_MS, HTTP_DRAIN_MAX, HTTP_DEADLINE_MS
+
+_ssl_ctx = None
+
+# (host, port, is_tls) -> idle _Conn, at most one per host
+_pool = {}
+_idle_ms = {}  # (host, port, is_tls) -> idle limit, when not HTTP_KEEPALIVE_IDLE_MS
+_scratch = bytearray(256)  # drain buffer
+
+# Metrics (see stats())
+requests = 0
+connects = 0
+handshakes = 0       # TLS connects
+reused = 0           # requests served on a pooled connection
+stale = 0            # pooled connections found closed and replaced
+expired = 0          # pooled connections dropped past their idle limit
+connect_ms_total = 0
+connect_ms_max = 0
+
+# Phase latency histograms: phase -> counts per HIST_BOUNDS_MS bucket (+ overflow)
+PHASES = ("dns", "connect", "headers", "body")
+HIST_BOUNDS_MS = (50, 100, 200, 500, 1000, 2000, 5000)
+_hist = {}
+timeouts = {}        # phase -> deadlines exceeded there
+
+
+class ApiStats:
+    """
+    Lifetime success/latency counters for one API's fetches (never reset,
+    so they can be scraped as counters; see status_server).
+    """
+
+    def __init__(self):
+        self.ok = 0
+        self.failed = 0
+        self.ms_last = 0
+        self.ms_max = 0
+        self.ms_total = 0
+
+    async def timed(self, aw):
+        """Await a fetch; a None result counts as a failure."""
+        t0 = time.ticks_ms()
+        r = None
+        try:
+            r = await aw
+            return r
+        finally:
+            ms = time.ticks_diff(time.ticks_ms(), t0)
+            if r is None:
+                self.failed += 1
+            else:
+                self.ok += 1
+            self.ms_last = ms
+            self.ms_total += ms
+            if ms > self.ms_max:
+                self.ms_max = ms
+
+    def as_dict(self):
+        n = self.ok + self.failed
+        return {"ok": self.ok, "failed": self.failed, "ms_last": self.ms_last,
+                "ms_max": self.ms_max, "ms_avg": self.ms_total // n if n else 0}
+
+
+class DeadlineExceeded(OSError):
+    """A GET ran past its deadline; .phase is where (one of PHASES)."""
+
+    def __init__(self, phase, host):
+        super().__init__("deadline exceeded in %s: %s" % (phase, host))
+        self.phase = phase
+
+
+def _record(phase, ms):
+    h = _hist.get(phase)
+    if h is None:
+        h = _hist[phase] = [0] * (len(HIST_BOUNDS_MS) + 1)
+    i = 0
+    for bound in HIST_BOUNDS_MS:
+        if ms < bound:
+            break
+        i += 1
+    h[i] += 1
+
+
+def _expired(phase, host):
+    timeouts[phase] = timeouts.get(phase, 0) + 1
+    print("http", "deadline exceeded in", phase, host)
+    return DeadlineExceeded(phase, host)
+
+
+async def _within(deadline, phase, host, aw):
+    """await aw, cancelling it and raising DeadlineExceeded at the deadline."""
+    left = time.ticks_diff(deadline, time.ticks_ms())
+    if left <= 0:
+        try:
+            aw.close()  # never started
+        except AttributeError:
+            pass
+        raise _expired(phase, host)
+    try:
+        return await asyncio.wait_for(aw, left / 1000)
+    except asyncio.TimeoutError:
+        raise _expired(phase, host)
+
+
+def _ssl_context():
+    """Shared client TLS context; like urequests, certificates are not verified."""
+    global _ssl_ctx
+    if _ssl_ctx is None:
+        import ssl
+        ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        try:
+            ctx.check_hostname = False
+        except Exception:
+            pass
+        ctx.verify_mode = ssl.CERT_NONE
+        _ssl_ctx = ctx
+    return _ssl_ctx
+
+
+def split_url(url):
+    """Split "http(s)://host[:port]/path?query" into (is_tls, host, port, path)."""
+    proto, _, rest = url.split("/", 2)
+    is_tls = proto == "https:"
+    host, sep, path = rest.partition("/")
+    port = 443 if is_tls else 80
+    if ":" in host:
+        host, port = host.split(":", 1)
+        port = int(port)
+    return is_tls, host, port, sep + path
+
+
+class _Conn:
+    """One open socket (reader/writer pair) and when it went idle."""
+
+    def __init__(self, key, reader, writer):
+        self.key = key
+        self.reader = reader
+        self.writer = writer
+        self.idle_since = None
+
+    def close(self):
+        w, self.writer = self.writer, None
+        if w is not None:
+            try:
+                w.close()
+            except Exception:
+                pass
+
+
+def keep_idle(url, ms):
+    """Keep pooled connections to url's host up to ms idle (e.g. its poll interval)."""
+    is_tls, host, port, _ = split_url(url)
+    _idle_ms[(host, port, is_tls)] = ms
+
+
+def _checkout(key):
+    """Take the idle connection for key, dropping it if too old or closed."""
+    global expired, stale
+    c = _pool.pop(key, None)
+    if c is None:
+        return None
+    r = c.reader
+    if time.ticks_diff(time.ticks_ms(), c.idle_since) > _idle_ms.get(key, HTTP_KEEPALIVE_IDLE_MS):
+        expired += 1
+        c.close()
+        return None
+    if hasattr(r, "at_eof") and r.at_eof():
+        stale += 1
+        c.close()
+        return None
+    return c
+
+
+def _checkin(c):
+    old = _pool.get(c.key)
+    if old is not None:
+        old.close()
+    c.idle_since = time.ticks_ms()
+    _pool[c.key] = c
+
+
+def close_all():
+    """Close every pooled connection (e.g. after the Wi-Fi link dropped)."""
+    for c in _pool.values():
+        c.close()
+    _pool.clear()
+
+
+class Response:
+    """
+    Status, headers and a body stream for one GET. The body is framed by
+    Content-Length or chunked encoding (decoded here) or, failing both, by the
+    server closing. Finish with `await aclose()` to return the connection to
+    the pool, or close() to drop it.
+    """
+
+    def __init__(self, conn, status, headers, keep, deadline):
+        self.conn = conn
+        self.reader = conn.reader
+        self.status = status
+        self.headers = headers
+        self.deadline = deadline
+        self._body_t0 = time.ticks_ms()
+        self._chunked = "chunked" in headers.get("transfer-encoding", "").lower()
+        cl = headers.get("content-length")
+        self._remaining = int(cl) if cl is not None and not self._chunked else None
+        self._chunk_left = 0
+        self._crlf = False   # chunk data ended; its CRLF is still unread
+        self._eof = False
+        # Reusable only if the body end is known without the server closing
+        self._keep = keep and (self._chunked or self._remaining is not None)
+
+    async def _io(self, aw):
+        """Socket read bounded by the request deadline."""
+        try:
+            return await _within(self.deadline, "body", self.conn.key[0], aw)
+        except DeadlineExceeded:
+            self._keep = False  # a read was cut off mid-stream
+            raise
+
+    async def _next_len(self, n):
+        """Bytes that may be read next (<= n); 0 at end of body."""
+        if self._eof:
+            return 0
+        if self._chunked:
+            if self._chunk_left == 0:
+                if self._crlf:
+                    await self._io(self.reader.readline())
+                    self._crlf = False
+                line = await self._io(self.reader.readline())
+                if not line:
+                    self._eof, self._keep = True, False
+                    return 0
+                size = int(line.split(b";", 1)[0].strip(), 16)
+                if size == 0:
+                    # Last chunk: skip trailers up to the blank line
+                    while True:
+                        line = await self._io(self.reader.readline())
+                        if not line or line == b"\r\n":
+                            break
+                    self._eof = True
+                    return 0
+                self._chunk_left = size
+            return min(n, self._chunk_left)
+        if self._remaining is not None:
+            if self._remaining == 0:
+                self._eof = True
+                return 0
+            return min(n, self._remaining)
+        return n
+
+    def _got(self, k):
+        if k == 0:
+            # Server closed: normal end for close-delimited bodies, else truncated
+            self._eof, self._keep = True, False
+        elif self._chunked:
+            self._chunk_left -= k
+            if self._chunk_left == 0:
+                self._crlf = True
+        elif self._remaining is not None:
+            self._remaining -= k
+
+    async def read(self, n=-1):
+        """Read up to n body bytes (n=-1: the rest of the body)."""
+        if n < 0:
+            parts = []
+            while True:
+                data = await self.read(1024)
+                if not data:
+                    return b"".join(parts)
+                parts.append(data)
+        k = await self._next_len(n)
+        if not k:
+            return b""
+        data = await self._io(self.reader.read(k))
+        self._got(len(data))
+        return data
+
+    async def readinto(self, buf):
+        """Read body bytes into buf; returns the count (0 at end of body)."""
+        k = await self._next_len(len(buf))
+        if not k:
+            return 0
+        r = self.reader
+        if hasattr(r, "readinto"):
+            n = await self._io(r.readinto(buf if k == len(buf) else memoryview(buf)[:k]))
+        else:
+            data = await self._io(r.read(k))  # CPython streams have no readinto
+            n = len(data)
+            buf[:n] = data
+        self._got(n)
+        return n
+
+    async def json(self):
+        return json.loads(await self.read())
+
+    async def aclose(self):
+        """
+        Finish the response: drain up to HTTP_DRAIN_MAX unread body bytes and
+        pool the connection if it can carry another request, else close it.
+        """
+        c = self.conn
+        if c is None:
+            return
+        try:
+            drained = 0
+            while self._keep and not self._eof and drained <= HTTP_DRAIN_MAX:
+                drained += await self.readinto(_scratch)
+        except Exception:
+            self._keep = False
+        self.conn = None
+        _record("body", time.ticks_diff(time.ticks_ms(), self._body_t0))
+        if self._keep and self._eof:
+            _checkin(c)
+        else:
+            c.close()
+
+    def close(self):
+        """Drop the connection without reusing it."""
+        c, self.conn = self.conn, None
+        if c is not None:
+            c.close()
+
+
+async def _connect(key, deadline):
+    global connects, handshakes, connect_ms_total, connect_ms_max
+    host, port, is_tls = key
+    # getaddrinfo blocks, so the deadline can only be checked once it returns
+    t0 = time.ticks_ms()
+    ip = dns_cache.resolve(host)
+    _record("dns", time.ticks_diff(time.ticks_ms(), t0))
+    if time.ticks_diff(deadline, time.ticks_ms()) <= 0:
+        raise _expired("dns", host)
+    t0 = time.ticks_ms()
+    try:
+        if is_tls:
+            aw = asyncio.open_connection(ip, port, ssl=_ssl_context(), server_hostname=host)
+        else:
+            aw = asyncio.open_connection(ip, port)
+        reader, writer = await _within(deadline, "connect", host, aw)
+    except DeadlineExceeded:
+        raise
+    except OSError:
+        dns_cache.expire(host)  # the address may have moved
+        raise
+    ms = time.ticks_diff(time.ticks_ms(), t0)
+    _record("connect", ms)
+    connects += 1
+    if is_tls:
+        handshakes += 1
+    connect_ms_total += ms
+    if ms > connect_ms_max:
+        connect_ms_max = ms
+    return _Conn(key, reader, writer)
+
+
+async def _exchange(conn, req, deadline):
+    """Send req on conn and read the status line and headers, within the deadline."""
+    t0 = time.ticks_ms()
+    resp = await _within(deadline, "headers", conn.key[0], _request(conn, req, deadline))
+    _record("headers", time.ticks_diff(time.ticks_ms(), t0))
+    return resp
+
+
+async def _request(conn, req, deadline):
+    conn.writer.write(req)
+    await conn.writer.drain()
+
+    line = await conn.reader.readline()
+    if not line:
+        raise OSError("connection closed")
+    parts = line.split(None, 2)
+    if len(parts) < 2:
+        raise OSError("bad status line")
+    status = int(parts[1])
+
+    hdrs = {}
+    while True:
+        line = await conn.reader.readline()
+        if not line or line == b"\r\n":
+            break
+        k, _, v = line.decode().partition(":")
+        hdrs[k.strip().lower()] = v.strip()
+
+    conn_hdr = hdrs.get("connection", "").lower()
+    if parts[0] == b"HTTP/1.0":
+        keep = conn_hdr == "keep-alive"
+    else:
+        keep = conn_hdr != "close"
+    return Response(conn, status, hdrs, HTTP_KEEPALIVE and keep, deadline)
+
+
+async def get(url, headers=None, deadline_ms=HTTP_DEADLINE_MS):
+    """
+    Issue an HTTP/1.1 GET and return a Response once the headers are read,
+    on a pooled connection to the host when one is available. deadline_ms
+    bounds the whole request, body reads included.
+    Raises DeadlineExceeded past the deadline, OSError (or asyncio errors)
+    on connect/protocol failure.
+    """
+    global requests, reused, stale
+    deadline = time.ticks_add(time.ticks_ms(), deadline_ms)
+    is_tls, host, port, path = split_url(url)
+    key = (host, port, is_tls)
+    req = f"GET {path} HTTP/1.1\r\nHost: {host}\r\n"
+    req += "Connection: keep-alive\r\n" if HTTP_KEEPALIVE else "Connection: close\r\n"
+    for k, v in (headers or {}).items():
+        req += f"{k}: {v}\r\n"
+    req = (req + "\r\n").encode()
+    requests += 1
+
+    conn = _checkout(key) if HTTP_KEEPALIVE else None
+    if conn is not None:
+        try:
+            resp = await _exchange(conn, req, deadline)
+            reused += 1
+            return resp
+        except DeadlineExceeded:
+            conn.close()
+            raise
+        except (OSError, EOFError):
+            # Server closed the idle socket; GET is safe to resend
+            conn.close()
+            stale += 1
+
+    conn = await _connect(key, deadline)
+    try:
+        return await _exchange(conn, req, deadline)
+    except BaseException:
+        conn.close()
+        raise
+
+
+def stats():
+    """Request/connection counters since reset_stats(), for the periodic log."""
+    return {
+        "requests": requests, "reused": reused, "connects": connects,
+        "handshakes": handshakes, "stale": stale, "expired": expired,
+        "connect_ms_avg": connect_ms_total // connects if connects else 0,
+        "connect_ms_max": connect_ms_max, "timeouts": timeouts,
+    }
+
+
+def histograms():
+    """
+    Phase latency histograms: {phase: [counts]}, one count per bucket
+    below each HIST_BOUNDS_MS bound, the last for slower requests.
+    """
+    return _hist
+
+
+def reset_stats():
+    global requests, connects, handshakes, reused, stale, expired
+    global connect_ms_total, connect_ms_max
+    requests = connects = handshakes = reused = stale = expired = 0
+    connect_ms_total = connect_ms_max = 0
+    timeouts.clear()
+    _hist.clear()
@@ -0,0 +1,310 @@
+# jsonstream.py
+# Incremental, field-projecting JSON reader.
+# Feeds a response body through a byte-level state machine in fixed-size
+# chunks and keeps only the declared key paths, so peak heap per fetch is
+# bounded by the projection instead of the response size.
+#
+# Paths are tuples of object keys (str) and array indices (int), e.g.
+#   ("current", "temperature_2m") or ("daily", "sunrise", 0).
+# Records collect selected fields from every object in an array, e.g.
+#   {("bustime-response", "prd"): ("rt", "rtdir", "prdctdn")}.
+# A single object at the record path counts as a one-element array (APIs
+# such as CTA's send {"error": {...}} or {"error": [{...}, ...]}).
+
+import json
+
+CHUNK_SIZE = 256
+
+_WS = (0x20, 0x09, 0x0A, 0x0D)
+_ESCAPES = {0x22: 0x22, 0x5C: 0x5C, 0x2F: 0x2F, 0x62: 0x08, 0x66: 0x0C, 0x6E: 0x0A, 0x72: 0x0D, 0x74: 0x09}
+_LITERALS = {b"true": True, b"false": False, b"null": None}
+
+# Parser states
+_VALUE, _KEY, _COLON, _NEXT, _STRING, _ATOM = range(6)
+
+
+class Extractor:
+    """
+    Push parser: call feed() with successive chunks until .done.
+
+    values:  {path: scalar} for the requested paths that were present
+    records: {array_path: [{field: scalar}, ...]}
+    done:    True once every path is found and every record array closed,
+             or the top-level value ended. False after EOF means truncated.
+    """
+
+    def __init__(self, paths=(), records=None):
+        self.values = {}
+        self.records = {}
+        self.done = False
+        self._want = {}
+        for p in paths:
+            self._want[tuple(p)] = True
+        self._rec = records or {}
+        for a in self._rec:
+            self.records[a] = []
+        self._open_rec = len(self._rec)
+        self._depths = set(len(p) for p in self._want)
+        self._rec_depths = set(len(a) for a in self._rec)
+        for a in self._rec:
+            self._depths.add(len(a))
+            self._depths.add(len(a) + 1)
+            self._depths.add(len(a) + 2)
+        self._max_depth = max(self._depths) if self._depths else 0
+
+        self._stack = []        # [is_object, key_or_index] per open container
+        self._state = _VALUE
+        self._tok = bytearray()
+        self._is_key = False
+        self._esc = 0           # 0 none, 1 after "\", 2..5 collecting \uXXXX digits
+        self._uval = 0
+        self._target = None     # where the current scalar goes: path tuple or field str
+        self._cur_rec = None    # record being filled: (array_path, depth, dict)
+
+    # ---- public ----
+
+    def feed(self, buf, n=None):
+        """Consume buf[:n]; returns self.done."""
+        i = 0
+        n = len(buf) if n is None else n
+        while i < n and not self.done:
+            st = self._state
+            if st == _STRING:
+                i = self._string(buf, i, n)
+                continue
+            c = buf[i]
+            if st == _ATOM:
+                if c in _WS or c == 0x2C or c == 0x7D or c == 0x5D:
+                    self._end_atom()
+                    continue  # re-dispatch the delimiter
+                if self._target is not None:
+                    self._tok.append(c)
+                i += 1
+                continue
+            i += 1
+            if c in _WS:
+                continue
+            if st == _VALUE:
+                self._begin_value(c)
+            elif st == _KEY:
+                if c == 0x22:
+                    self._is_key = True
+                    self._state = _STRING
+                elif c == 0x7D:
+                    self._close()
+                else:
+                    raise ValueError("expected key")
+            elif st == _COLON:
+                if c != 0x3A:
+                    raise ValueError("expected ':'")
+                self._state = _VALUE
+            else:  # _NEXT
+                if c == 0x2C:
+                    top = self._stack[-1]
+                    if top[0]:
+                        self._state = _KEY
+                    else:
+                        top[1] += 1
+                        self._state = _VALUE
+                elif c == 0x7D or c == 0x5D:
+                    self._close()
+                else:
+                    raise ValueError("expected ',' or close")
+        return self.done
+
+    # ---- internals ----
+
+    def _path(self):
+        return tuple(e[1] for e in self._stack)
+
+    def _rec_array(self, path):
+        # Array path if `path` sits at a record array's element level, else None
+        a = path[:-1]
+        if path and a in self._rec and isinstance(path[-1], int):
+            return a
+        return None
+
+    def _begin_value(self, c):
+        if c == 0x5D and self._stack and not self._stack[-1][0]:
+            self._close()  # empty array
+            return
+        depth = len(self._stack)
+        path = self._path() if depth in self._depths else None
+
+        target = None
+        if path is not None:
+            if path in self._want:
+                target = path
+            else:
+                rec = self._cur_rec
+                if rec is not None and depth == rec[1] and path[-1] in self._rec[rec[0]]:
+                    target = path[-1]
+
+        if c == 0x7B:
+            if path is not None and self._cur_rec is None:
+                a = path if path in self._rec else self._rec_array(path)
+                if a is not None:
+                    self._cur_rec = (a, depth + 1, {})
+            self._stack.append([True, None])
+            self._state = _KEY
+        elif c == 0x5B:
+            self._stack.append([False, 0])
+            self._state = _VALUE
+        elif c == 0x22:
+            self._target = target
+            self._is_key = False
+            self._state = _STRING
+        else:
+            self._target = target
+            if target is not None:
+                self._tok.append(c)
+            self._state = _ATOM
+
+    def _close(self):
+        depth = len(self._stack)
+        self._stack.pop()
+        rec = self._cur_rec
+        if rec is not None and depth == rec[1]:
+            self.records[rec[0]].append(rec[2])
+            self._cur_rec = None
+            if self._path() == rec[0]:  # a lone object, not an array element
+                self._open_rec -= 1
+                self._check_done()
+        elif (depth - 1) in self._rec_depths and self._path() in self._rec:
+            self._open_rec -= 1
+            self._check_done()
+        if not self._stack:
+            self.done = True
+        else:
+            self._state = _NEXT
+
+    def _string(self, buf, i, n):
+        # Keys only matter up to the deepest requested path
+        keep = (self._is_key and len(self._stack) <= self._max_depth) or self._target is not None
+        tok = self._tok
+        while i < n:
+            c = buf[i]
+            i += 1
+            esc = self._esc
+            if esc == 1:
+                if c == 0x75:  # \uXXXX
+                    self._esc = 2
+                    self._uval = 0
+                else:
+                    if keep:
+                        tok.append(_ESCAPES.get(c, c))
+                    self._esc = 0
+            elif esc:
+                self._uval = (self._uval << 4) | int(chr(c), 16)
+                if esc == 5:
+                    self._esc = 0
+                    if keep:
+                        u = self._uval
+                        tok.extend(b"?" if 0xD800 <= u < 0xE000 else chr(u).encode())
+                else:
+                    self._esc = esc + 1
+            elif c == 0x5C:
+                self._esc = 1
+            elif c == 0x22:
+                self._end_string()
+                return i
+            elif keep:
+                tok.append(c)
+        return i
+
+    def _end_string(self):
+        if self._is_key:
+            self._stack[-1][1] = str(self._tok, "utf-8") if self._tok else None
+            self._tok = bytearray()
+            self._state = _COLON
+            return
+        if self._target is not None:
+            self._emit(str(self._tok, "utf-8"))
+            self._tok = bytearray()
+        self._after_scalar()
+
+    def _end_atom(self):
+        if self._target is not None:
+            tok = bytes(self._tok)
+            self._tok = bytearray()
+            if tok in _LITERALS:
+                v = _LITERALS[tok]
+            else:
+                s = str(tok, "utf-8")
+                v = float(s) if ("." in s or "e" in s or "E" in s) else int(s)
+            self._emit(v)
+        self._after_scalar()
+
+    def _emit(self, v):
+        t = self._target
+        self._target = None
+        if isinstance(t, tuple):
+            self.values[t] = v
+            if self._want.pop(t, None):
+                self._check_done()
+        else:
+            self._cur_rec[2][t] = v
+
+    def _after_scalar(self):
+        self._target = None
+        if not self._stack:
+            self.done = True
+        else:
+            self._state = _NEXT
+
+    def _check_done(self):
+        if not self._want and self._open_rec <= 0:
+            self.done = True
+
+
+async def extract(resp, paths=(), records=None, chunk_size=CHUNK_SIZE):
+    """
+    Stream resp's body through an Extractor in chunk_size reads, stopping as
+    soon as everything requested has been seen. Returns the Extractor.
+    """
+    ex = Extractor(paths, records)
+    buf = bytearray(chunk_size)
+    while not ex.done:
+        n = await resp.readinto(buf)
+        if not n:
+            break
+        ex.feed(buf, n)
+    return ex
+
+
+def project(data, paths=(), records=None):
+    """
+    Apply the same projection to an already-decoded JSON tree (the legacy
+    full-parse path); returns an Extractor-shaped result.
+    """
+    ex = Extractor(paths, records)
+    for p in ex._want:
+        node = data
+        try:
+            for k in p:
+                node = node[k]
+        except (KeyError, IndexError, TypeError):
+            continue
+        if not isinstance(node, (dict, list)):
+            ex.values[p] = node
+    for a, fields in ex._rec.items():
+        node = data
+        try:
+            for k in a:
+                node = node[k]
+        except (KeyError, IndexError, TypeError):
+            continue
+        if isinstance(node, dict):
+            node = [node]
+        for el in node or ():
+            if isinstance(el, dict):
+                ex.records[a].append({f: el[f] for f in fields if f in el})
+    ex.done = True
+    return ex
+
+
+async def read_json(resp, paths=(), records=None, stream=True, chunk_size=CHUNK_SIZE):
+    """Projected read of a response body: streaming, or full json.loads when stream=False."""
+    if stream:
+        return await extract(resp, paths, records, chunk_size)
+    return project(json.loads(await resp.read()), paths, records)
@@ -3,7 +3,16 @@ import time
 import network
 import machine
 
-from config import SPINNER_FRAMES
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+from config import (
+    SPINNER_FRAMES, WIFI_CHECK_MS, WIFI_ATTEMPT_MS, WIFI_ATTEMPTS_PER_RESET,
+    WIFI_BACKOFF_MIN_MS, WIFI_BACKOFF_MAX_MS, WIFI_REBOOT_AFTER_MS,
+)
+import clock
 
 try:
     import ntpclient
@@ -16,11 +25,14 @@ STAT_NO_AP_FOUND   = -2
 STAT_WRONG_PASS    = -3
 
 # NTP settings
-NTP_RESYNC_MS = 6 * 60 * 60 * 1000  # 6 hours (normal throttle)
+NTP_RESYNC_MS = 6 * 60 * 60 * 1000  # 6 hours (until the drift is known; also the minimum)
+NTP_RESYNC_MAX_MS = 48 * 60 * 60 * 1000  # longest resync interval for a stable clock
+NTP_MAX_ERROR_MS = 250              # drift allowed to build up between syncs
 NTP_PANIC_MAX_TRIES = 5             # max forced attempts if clock is bogus
 NTP_SERVERS = ("pool.ntp.org", "time.google.com", "time.cloudflare.com")
 
 _last_ntp_sync_ms = -999_999
+_ntp_interval_ms = NTP_RESYNC_MS
 _last_ntp_server_idx = -1
 
 wlan = network.WLAN(network.STA_IF)
@@ -35,6 +47,13 @@ def set_status_callback(cb):
     global _status_cb
     _status_cb = cb
 
+# Called after each successful sync, on the thread that synced; the app
+# routes it to the render side in FETCH_WORKER mode
+_synced_cb = clock.invalidate
+def set_synced_callback(cb):
+    global _synced_cb
+    _synced_cb = cb
+
 def _status_screen(l1, l2=""):
     if _status_cb:
         try: _status_cb(l1, l2)
@@ -45,8 +64,7 @@ def has_reasonable_time():
     Heuristic: if the RTC year is recent (>= 2024), we consider the clock 'good'.
     """
     try:
-        y, m, d, hh, mm, ss, wd, yd = time.gmtime()
-        return y >= 2024
+        return time.gmtime()[0] >= 2024
     except Exception:
         return False
 
@@ -61,99 +79,242 @@ def _set_ntp_server_round_robin():
         pass
 
 
-def sync_clock(force=False, panic_if_bad=False):
-    global _last_ntp_sync_ms
-    now_ms = time.ticks_ms()
-
+def _ntp_due(force):
     # Check throttling
-    if not force and time.ticks_diff(now_ms, _last_ntp_sync_ms) < NTP_RESYNC_MS:
-        return
-    if not wlan.isconnected():
-        return
-    try:
-        ntpclient.settime()
-        _last_ntp_sync_ms = time.ticks_ms()
-        print("NTP sync complete")
-        return True
-    except Exception:
-        if panic_if_bad:
-            # Retry multiple times if RTC is bad
-            for _ in range(NTP_PANIC_MAX_TRIES):
-                try:
-                    ntpclient.settime()
-                    _last_ntp_sync_ms = time.ticks_ms()
-                    print("NTP sync complete")
-                    return True
-                except Exception:
-                    time.sleep(1)
+    if not force and time.ticks_diff(time.ticks_ms(), _last_ntp_sync_ms) < _ntp_interval_ms:
         return False
+    return wlan.isconnected()
 
-def ensure_wifi(
-    ssid,
-    password,
-    timeout_ms_per_attempt=6000,
-    max_interface_time_ms=15000,
-    total_deadline_ms=60000,
-    backoff_ms=400,
-):
-    if not wlan.active():
-        wlan.active(True)
-    if wlan.isconnected():
-        return True
 
-    start = time.ticks_ms()
-    attempt = 0
+def _ntp_synced():
+    """
+    Bookkeeping after a successful sync. The resync interval doubles while the
+    measured drift keeps the expected error under NTP_MAX_ERROR_MS.
+    """
+    global _last_ntp_sync_ms, _ntp_interval_ms
+    _last_ntp_sync_ms = time.ticks_ms()
+    _synced_cb()
+    drift = ntpclient.drift_ppm
+    if drift is None:
+        _ntp_interval_ms = NTP_RESYNC_MS
+    else:
+        cap = NTP_RESYNC_MAX_MS if not drift else int(NTP_MAX_ERROR_MS * 1e6 / abs(drift))
+        _ntp_interval_ms = max(NTP_RESYNC_MS, min(_ntp_interval_ms * 2, cap, NTP_RESYNC_MAX_MS))
+    r = ntpclient.last
+    print("NTP sync complete:", r["server"], "delay ms", r["delay_ms"],
+          "offset ms", r["offset_ms"], "drift ppm", None if drift is None else int(drift * 10) / 10,
+          "next in min", _ntp_interval_ms // 60000)
 
-    while True:
-        attempt += 1
+
+def sync_clock(force=False, panic_if_bad=False):
+    """Blocking sync for boot, before the event loop runs."""
+    if not _ntp_due(force):
+        return
+    tries = 1 + (NTP_PANIC_MAX_TRIES if panic_if_bad else 0)
+    for i in range(tries):
         try:
-            wlan.connect(ssid, password)
+            ntpclient.settime(NTP_SERVERS)
+            _ntp_synced()
+            return True
         except Exception:
-            pass
+            if i + 1 < tries:
+                time.sleep(1)
+    return False
+
+
+async def sync_clock_async(force=False, panic_if_bad=False):
+    """sync_clock() for the asyncio runtime: NTP waits yield to other tasks."""
+    if not _ntp_due(force):
+        return
+    tries = 1 + (NTP_PANIC_MAX_TRIES if panic_if_bad else 0)
+    for i in range(tries):
+        try:
+            await ntpclient.settime_async(NTP_SERVERS)
+            _ntp_synced()
+            return True
+        except Exception:
+            if i + 1 < tries:
+                await asyncio.sleep(1)
+    return False
+
+
+_STATUS_TEXT = {
+    STAT_WRONG_PASS: "wrong pass",
+    STAT_NO_AP_FOUND: "no AP",
+    STAT_CONNECT_FAIL: "connect fail",
+}
+
+
+class WifiLink:
+    """
+    Non-blocking Wi-Fi connection state machine; step() does one small piece
+    of work and returns how long until it wants to run again, so it can live
+    in a task while the screens keep running. Failed attempts back off, every
+    WIFI_ATTEMPTS_PER_RESET of them the interface is reset, and the board is
+    rebooted only after WIFI_REBOOT_AFTER_MS offline.
+    """
+
+    UP, CONNECT, WAIT, BACKOFF, RESET, RESET_UP = range(6)
+
+    def __init__(self):
+        self.ssid = None
+        self.password = None
+        self.state = WifiLink.UP   # the first step() notices if it is not
+        self.error = None          # why the last attempt failed
+        self.down_since = None     # ticks_ms the link was found down
+        self.attempts = 0          # connect attempts in this outage
+        self._t = 0                # attempt start / backoff end
+        self._ever_up = False
+        # Metrics (see stats())
+        self.outages = 0
+        self.resets = 0
+        self.outage_ms_last = 0
+        self.outage_ms_max = 0
+        self.reconnect_ms_last = 0  # connect() to got-IP of the attempt that worked
+        self.reconnect_ms_max = 0
+
+    def begin(self, ssid, password):
+        self.ssid = ssid
+        self.password = password
+
+    def up(self):
+        return self.state == WifiLink.UP
+
+    def _backoff_ms(self):
+        return min(WIFI_BACKOFF_MIN_MS << min(self.attempts - 1, 10), WIFI_BACKOFF_MAX_MS)
+
+    def _connected(self, now):
+        ms = time.ticks_diff(now, self._t)
+        self.reconnect_ms_last = ms
+        self.reconnect_ms_max = max(self.reconnect_ms_max, ms)
+        outage = time.ticks_diff(now, self.down_since)
+        if self._ever_up:
+            self.outages += 1
+            self.outage_ms_last = outage
+            self.outage_ms_max = max(self.outage_ms_max, outage)
+        self._ever_up = True
+        print("Wi-Fi up: down ms", outage, "connect ms", ms, "attempts", self.attempts)
+        self.state = WifiLink.UP
+        self.down_since = None
+        self.error = None
+
+    def step(self, now):
+        """Advance the state machine; returns ms until the next step is due."""
+        st = self.state
+        if st == WifiLink.UP:
+            if wlan.isconnected():
+                return WIFI_CHECK_MS
+            print("Wi-Fi down")
+            self.down_since = now
+            self.attempts = 0
+            st = self.state = WifiLink.CONNECT
+        elif time.ticks_diff(now, self.down_since) >= WIFI_REBOOT_AFTER_MS:
+            print("Wi-Fi down for", WIFI_REBOOT_AFTER_MS // 60000, "min, rebooting")
+            machine.reset()
 
-        att_start = time.ticks_ms()
-        frame = 0
+        if st == WifiLink.CONNECT:
+            if not wlan.active():
+                wlan.active(True)
+            try:
+                wlan.connect(self.ssid, self.password)
+            except Exception:
+                pass
+            self.attempts += 1
+            self._t = now
+            self.state = WifiLink.WAIT
+            return 100
 
-        while True:
+        if st == WifiLink.WAIT:
             s = wlan.status()
             if s == STAT_GOT_IP or wlan.isconnected():
-                _status_screen("WiFi", "connected")
-                # Initial: force sync and panic if the RTC is bogus.
-                try:
-                    sync_clock(force=True, panic_if_bad=True)
-                except Exception:
-                    pass
-                time.sleep(0.2)
-                return True
-
-            if s in (STAT_WRONG_PASS, STAT_NO_AP_FOUND, STAT_CONNECT_FAIL):
-                msg = "wrong pass" if s == STAT_WRONG_PASS else ("no AP" if s == STAT_NO_AP_FOUND else "connect fail")
-                _status_screen("WiFi error", msg)
-                time.sleep(1.0)
-                break
-
-            _status_screen("WiFi", f"{SPINNER_FRAMES[frame]}")
-            frame = (frame + 1) % len(SPINNER_FRAMES)
-            time.sleep(0.01)
-
-            if time.ticks_diff(time.ticks_ms(), att_start) >= timeout_ms_per_attempt:
-                break
+                self._connected(now)
+                return WIFI_CHECK_MS
+            self.error = _STATUS_TEXT.get(s)
+            if self.error is None and time.ticks_diff(now, self._t) < WIFI_ATTEMPT_MS:
+                return 100
+            self.error = self.error or "timeout"
+            if self.attempts % WIFI_ATTEMPTS_PER_RESET == 0:
+                self.state = WifiLink.RESET
+                return 0
+            self.state = WifiLink.BACKOFF
+            self._t = time.ticks_add(now, self._backoff_ms())
+            return self._backoff_ms()
 
-            if time.ticks_diff(time.ticks_ms(), start) >= total_deadline_ms:
-                _status_screen("WiFi timeout", "rebooting…")
-                time.sleep(1.0)
-                machine.reset()
+        if st == WifiLink.BACKOFF:
+            left = time.ticks_diff(self._t, now)
+            if left > 0:
+                return left
+            self.state = WifiLink.CONNECT
+            return 0
 
-        if time.ticks_diff(time.ticks_ms(), att_start) >= max_interface_time_ms:
-            try: wlan.disconnect()
-            except Exception: pass
+        if st == WifiLink.RESET:
+            # Power-cycle the interface; it comes back up on the next step
+            try:
+                wlan.disconnect()
+            except Exception:
+                pass
             wlan.active(False)
-            time.sleep(0.2)
-            wlan.active(True)
-            try: wlan.config(pm=0xA11140)
-            except Exception: pass
-
-        t_end = time.ticks_add(time.ticks_ms(), backoff_ms)
-        while time.ticks_diff(t_end, time.ticks_ms()) > 0:
-            _status_screen("retrying…", f"attempt {attempt}")
-            time.sleep(0.12)
+            self.resets += 1
+            self.state = WifiLink.RESET_UP
+            return 200
+
+        # RESET_UP
+        wlan.active(True)
+        try:
+            wlan.config(pm=0xA11140)
+        except Exception:
+            pass
+        self.state = WifiLink.BACKOFF
+        self._t = time.ticks_add(now, self._backoff_ms())
+        return self._backoff_ms()
+
+    def stats(self):
+        """Outage/reconnect counters, for the periodic log."""
+        return {
+            "outages": self.outages, "resets": self.resets,
+            "outage_ms_last": self.outage_ms_last, "outage_ms_max": self.outage_ms_max,
+            "reconnect_ms_last": self.reconnect_ms_last,
+            "reconnect_ms_max": self.reconnect_ms_max,
+        }
+
+
+link = WifiLink()
+
+
+def ensure_wifi(ssid, password, total_deadline_ms=60000):
+    """
+    Blocking connect for boot: steps `link` with a status screen, reboots if
+    not connected within total_deadline_ms, then forces an NTP sync.
+    """
+    link.begin(ssid, password)
+    if not wlan.active():
+        wlan.active(True)
+    if wlan.isconnected():
+        return True
+    start = time.ticks_ms()
+    frame = 0
+    while True:
+        now = time.ticks_ms()
+        wait = link.step(now)
+        if link.up():
+            break
+        if time.ticks_diff(now, start) >= total_deadline_ms:
+            _status_screen("WiFi timeout", "rebooting…")
+            time.sleep(1)
+            machine.reset()
+        if link.state == WifiLink.RESET_UP:
+            _status_screen("WiFi", "reset")
+        elif link.state == WifiLink.BACKOFF and link.error:
+            _status_screen("WiFi error", link.error)
+        else:
+            _status_screen("WiFi", SPINNER_FRAMES[frame])
+            frame = (frame + 1) % len(SPINNER_FRAMES)
+        time.sleep(min(wait, 120) / 1000)
+    _status_screen("WiFi", "connected")
+    # Initial: force sync and panic if the RTC is bogus.
+    try:
+        sync_clock(force=True, panic_if_bad=True)
+    except Exception:
+        pass
+    time.sleep(0.2)
+    return True
@@ -1,14 +1,33 @@
 # ntpclient.py
 # Lightweight NTP client for MicroPython (sets RTC directly)
+#
+# sync_async() queries every server at once over non-blocking UDP, a few
+# samples each, and keeps the sample with the smallest round-trip delay
+# (offset/delay from the four NTP timestamps). The RTC is stepped on a whole
+# server second. Between syncs the local clock is followed on ticks_ms from
+# the last step, so the next sync measures how far it drifted (drift_ppm).
+# Server names are resolved through dns_cache.
 
 import socket
 import struct
 import time
 import machine
 
+import dns_cache
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
 NTP_DELTA = 2208988800  # seconds between 1900 and 1970
 NTP_PORT = 123
-NTP_PACKET = b'\x1b' + 47 * b'\0'
+
+NTP_SAMPLES = 3          # requests per server per sync
+NTP_SAMPLE_GAP_MS = 150  # resend to a server after this long without a reply
+NTP_TIMEOUT_MS = 2000    # whole sync, all servers
+NTP_STEP_MIN_MS = 100    # leave the RTC alone when it is off by less than this
+NTP_DRIFT_MIN_MS = 10 * 60 * 1000  # shortest baseline for a drift estimate
 
 DEFAULT_SERVERS = (
     "pool.ntp.org",
@@ -16,32 +35,171 @@ DEFAULT_SERVERS = (
     "time.cloudflare.com",
 )
 
-def get_ntp_time(host="pool.ntp.org", timeout=3):
-    addr = socket.getaddrinfo(host, NTP_PORT)[0][-1]
-    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    s.settimeout(timeout)
+# Clock model: true time (ms since 1970) was _ref_ms at ticks_ms() == _ref_tick
+_ref_ms = None
+_ref_tick = None
+drift_ppm = None        # local clock rate error from the last two syncs
+last = None             # result dict of the last successful sync
+
+_seq = 0
+
+
+def _ntp_ms(msg, off):
+    """NTP timestamp at msg[off:off+8] -> ms since 1970."""
+    sec, frac = struct.unpack("!II", msg[off:off + 8])
+    return (sec - NTP_DELTA) * 1000 + ((frac * 1000) >> 32)
+
+
+def _valid(msg, tag):
+    if len(msg) < 48 or msg[24:32] != tag:
+        return False
+    li, mode, stratum = msg[0] >> 6, msg[0] & 7, msg[1]
+    return mode == 4 and li != 3 and 1 <= stratum <= 15
+
+
+class _Peer:
+    """One server: its socket and the request in flight."""
+
+    def __init__(self, host):
+        self.host = host
+        self.addr = dns_cache.addr(host, NTP_PORT)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.sent = 0
+        self.replies = 0
+        self.tag = None
+        self.sent_tick = None
+
+    def send(self, now):
+        global _seq
+        _seq = (_seq + 1) & 0xFFFFFFFF
+        pkt = bytearray(48)
+        pkt[0] = 0x1B  # LI 0, version 3, mode 3 (client)
+        # Transmit timestamp carries a tag the server echoes as the originate time
+        struct.pack_into("!II", pkt, 40, _seq, now)
+        self.tag = bytes(pkt[40:48])
+        self.sent_tick = now
+        self.sent += 1
+        self.sock.sendto(pkt, self.addr)
+
+    def poll(self):
+        """A (delay_ms, server_ms, tick) sample if a valid reply arrived, else None."""
+        try:
+            msg = self.sock.recv(48)
+        except OSError:
+            return None
+        t4 = time.ticks_ms()
+        if self.tag is None or not _valid(msg, self.tag):
+            return None
+        self.tag = None
+        self.replies += 1
+        t2 = _ntp_ms(msg, 32)   # server receive
+        t3 = _ntp_ms(msg, 40)   # server transmit
+        delay = max(0, time.ticks_diff(t4, self.sent_tick) - (t3 - t2))
+        return delay, t3 + delay // 2, t4
+
+    def close(self):
+        try:
+            self.sock.close()
+        except Exception:
+            pass
+
+
+async def _best_sample(servers, timeout_ms):
+    """Lowest-delay (delay_ms, server_ms, tick, host) over all servers, or None."""
+    peers = []
+    for host in servers:
+        try:
+            peers.append(_Peer(host))
+        except Exception:
+            pass
+    best = None
+    deadline = time.ticks_add(time.ticks_ms(), timeout_ms)
     try:
-        s.sendto(NTP_PACKET, addr)
-        msg = s.recv(48)
+        while peers:
+            now = time.ticks_ms()
+            if time.ticks_diff(deadline, now) <= 0:
+                break
+            waiting = False
+            for p in peers:
+                s = p.poll()
+                if s is not None and (best is None or s[0] < best[0]):
+                    best = (s[0], s[1], s[2], p.host)
+                if p.replies >= NTP_SAMPLES:
+                    continue
+                if p.tag is None or time.ticks_diff(now, p.sent_tick) >= NTP_SAMPLE_GAP_MS:
+                    if p.sent < NTP_SAMPLES * 2:
+                        try:
+                            p.send(now)
+                        except OSError:
+                            p.tag = None
+                            continue
+                waiting = waiting or p.tag is not None
+            if not waiting:
+                break
+            await asyncio.sleep(0.01)
     finally:
-        s.close()
+        for p in peers:
+            if p.replies == 0:
+                dns_cache.expire(p.host)  # resolve again next time
+            p.close()
+    return best
+
+
+def _set_rtc(t):
+    tm = time.gmtime(t)
+    machine.RTC().datetime((tm[0], tm[1], tm[2], tm[6]+1, tm[3], tm[4], tm[5], 0))
+
+
+async def _step_rtc(server_ms, tick):
+    """Set the RTC at the next whole server second and restart the clock model there."""
+    global _ref_ms, _ref_tick
+    now = server_ms + time.ticks_diff(time.ticks_ms(), tick)
+    await asyncio.sleep((1000 - now % 1000) / 1000)
+    t = time.ticks_ms()
+    now = server_ms + time.ticks_diff(t, tick)
+    _set_rtc(now // 1000)
+    _ref_ms, _ref_tick = now, t
+
+
+async def sync_async(servers=DEFAULT_SERVERS, timeout_ms=NTP_TIMEOUT_MS):
+    """
+    Sample the servers concurrently and correct the RTC from the best sample.
+    Returns {"server", "delay_ms", "offset_ms" (None on the first sync),
+    "drift_ppm", "stepped"}; raises OSError if no server answered.
+    """
+    global drift_ppm, last
+    best = await _best_sample(servers, timeout_ms)
+    if best is None:
+        raise OSError("no NTP reply")
+    delay, server_ms, tick, host = best
+
+    offset = None
+    if _ref_tick is not None:
+        elapsed = time.ticks_diff(tick, _ref_tick)
+        if elapsed > 0:
+            offset = server_ms - (_ref_ms + elapsed)
+            if elapsed >= NTP_DRIFT_MIN_MS:
+                drift_ppm = offset * 1e6 / elapsed
+    stepped = offset is None or abs(offset) >= NTP_STEP_MIN_MS
+    if stepped:
+        await _step_rtc(server_ms, tick)
+    last = {"server": host, "delay_ms": delay, "offset_ms": offset,
+            "drift_ppm": drift_ppm, "stepped": stepped}
+    return last
 
-    val = struct.unpack("!I", msg[40:44])[0]
-    return val - NTP_DELTA  # seconds since 1970 UTC
 
 def settime(servers=DEFAULT_SERVERS):
     """
-    Tries multiple servers until success. Sets Pico's RTC in UTC.
+    Blocking sync_async() for use before the event loop starts. Sets Pico's RTC in UTC.
     """
-    rtc = machine.RTC()
-    last_error = None
-    for server in servers:
-        try:
-            t = get_ntp_time(server)
-            tm = time.gmtime(t)
-            rtc.datetime((tm[0], tm[1], tm[2], tm[6]+1, tm[3], tm[4], tm[5], 0))
-            return True
-        except Exception as e:
-            last_error = e
-            time.sleep(0.5)
-    raise last_error
+    asyncio.run(sync_async(servers))
+    return True
+
+
+async def settime_async(servers=DEFAULT_SERVERS):
+    """
+    Async settime(): yields to other tasks while waiting for replies.
+    """
+    await sync_async(servers)
+    return True
@@ -0,0 +1,105 @@
+# poll_sched.py
+# Adaptive poll timing for the data sources (weather, CTA).
+# After each poll, the next one is planned from:
+# - the base interval, or for CTA how soon the nearest bus arrives (fast when
+#   one is close, slow when the next is far out), faster in the morning window
+# - exponential backoff with jitter after failed polls
+# When checking whether a source is due, a hidden screen's poll is held back
+# until just before that screen comes up (prefetch), so data is fresh when it
+# appears, and any poll waits out a running transition.
+# Decisions are logged, with request counts against the fixed intervals.
+
+import time
+import random
+
+from config import (
+    CTA_POLL_MIN_SECONDS, CTA_POLL_MAX_SECONDS, CTA_NEAR_MIN, CTA_FAR_MIN,
+    CTA_POLL_MORNING_FACTOR, POLL_PREFETCH_MS, POLL_LOG,
+    RETRY_BACKOFF_MIN_MS, RETRY_BACKOFF_MAX_MS,
+)
+
+
+def cta_interval_ms(nearest_s, morning=False):
+    """
+    CTA poll interval from the nearest predicted arrival (seconds, or None if
+    unknown): CTA_POLL_MIN_SECONDS at CTA_NEAR_MIN minutes or less, rising
+    linearly to CTA_POLL_MAX_SECONDS at CTA_FAR_MIN minutes and beyond.
+    Returns (ms, reason).
+    """
+    if nearest_s is None:
+        secs = CTA_POLL_MAX_SECONDS
+        reason = "no arrivals"
+    else:
+        near, far = CTA_NEAR_MIN * 60, CTA_FAR_MIN * 60
+        if nearest_s <= near:
+            secs = CTA_POLL_MIN_SECONDS
+        elif nearest_s >= far:
+            secs = CTA_POLL_MAX_SECONDS
+        else:
+            span = CTA_POLL_MAX_SECONDS - CTA_POLL_MIN_SECONDS
+            secs = CTA_POLL_MIN_SECONDS + span * (nearest_s - near) // (far - near)
+        reason = "bus in %dm" % (nearest_s // 60)
+    if morning:
+        secs = max(CTA_POLL_MIN_SECONDS, int(secs * CTA_POLL_MORNING_FACTOR))
+        reason += ", morning"
+    return secs * 1000, reason
+
+
+def backoff_ms(failures):
+    """Retry delay after `failures` consecutive errors: doubling, capped, half jittered."""
+    delay = min(RETRY_BACKOFF_MIN_MS << min(failures - 1, 16), RETRY_BACKOFF_MAX_MS)
+    half = delay // 2
+    return half + half * random.getrandbits(8) // 255
+
+
+class Source:
+    """Poll timing for one data source; the owning task asks due() each check."""
+
+    def __init__(self, name, fixed_ms):
+        self.name = name
+        self.fixed_ms = fixed_ms   # the old fixed interval, for comparison
+        self.next_ms = None        # planned poll time (None: poll now)
+        self.reason = "start"
+        self.failures = 0
+        self.polls = 0
+        self._since = time.ticks_ms()
+
+    def due(self, now_ms, visible_in_ms=0, animating=False):
+        """
+        True if the source should be polled now. visible_in_ms: how long until
+        its screen shows (0 if showing). A poll planned while the screen is
+        hidden waits until POLL_PREFETCH_MS before it appears; any poll waits
+        while animating (a screen transition is running).
+        """
+        if animating:
+            return False
+        if self.next_ms is not None and time.ticks_diff(now_ms, self.next_ms) < 0:
+            return False
+        return visible_in_ms <= POLL_PREFETCH_MS
+
+    def done(self, now_ms, ok, interval_ms, reason):
+        """Plan the next poll: interval_ms after a success, backoff after a failure."""
+        self.polls += 1
+        if ok:
+            self.failures = 0
+        else:
+            self.failures += 1
+            interval_ms = backoff_ms(self.failures)
+            reason = "retry %d" % self.failures
+        self.next_ms = time.ticks_add(now_ms, interval_ms)
+        self.reason = reason
+        if POLL_LOG:
+            print("poll", self.name, "ok" if ok else "failed",
+                  "next in", interval_ms // 1000, "s (" + reason + ")")
+
+    def wait_ms(self, now_ms):
+        return 0 if self.next_ms is None else max(0, time.ticks_diff(self.next_ms, now_ms))
+
+    def stats(self, now_ms):
+        """(polls made, polls the fixed interval would have made) since reset."""
+        fixed = time.ticks_diff(now_ms, self._since) // self.fixed_ms + 1
+        return self.polls, fixed
+
+    def reset_stats(self, now_ms):
+        self.polls = 0
+        self._since = now_ms
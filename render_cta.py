@@ -1,36 +1,85 @@
 # render_cta.py
 # CTA screen: each configured row shows "<rt><dir_label>" on the left
 # and a 3-character rotating token (minutes/DUE/DLY/NOA) on the right.
+# ROWS_PER_PAGE rows fit the panel; with more rows the screen shows one page
+# at a time (the app pages/scrolls between them), so drawing a page costs
+# the same however many rows there are.
 
-from display import clear, draw_text, update, text_width
-from config import LINE_HEIGHT, TEXT_SCALE, CTA_TOGGLE_MS, DISPLAY_WIDTH
+from display import clear, draw_text, draw_pixel, text_width, fit_text, make_pen
+from config import (
+    LINE_HEIGHT, TEXT_SCALE, CTA_TOGGLE_MS, DISPLAY_WIDTH, DISPLAY_HEIGHT, STALE_DOT_RGB,
+)
 from cta_api import token3
 
-def draw_cta_toggle(cta_rows_data, now_ms, x_offset=0, clear_first=True):
+ROWS_PER_PAGE = max(1, (DISPLAY_HEIGHT - 2) // LINE_HEIGHT)
+
+# Row record fields (make_row() returns a tuple)
+ROW_PREFIX, ROW_PEN, ROW_MINUTES, ROW_TOKENS, ROW_STALE = range(5)
+
+# Last inputs tuple and what it was built from (rows list, toggle index)
+_inputs = None
+_inputs_rows = None
+_inputs_idx = None
+
+
+def make_row(prefix, pen, minutes, stale=False):
+    """
+    Row record for draw_cta_toggle, indexed by the ROW_* constants; 3-char
+    tokens are formatted once here.
+    stale: minutes are from an older poll (the last refresh failed).
+    """
+    return (prefix, pen, minutes, [token3(m) for m in minutes], stale)
+
+
+def page_count(cta_rows_data):
+    return max(1, (len(cta_rows_data) + ROWS_PER_PAGE - 1) // ROWS_PER_PAGE)
+
+
+def cta_inputs(cta_rows_data, now_ms):
+    """
+    Everything visible on the CTA screen, as a comparable tuple: the rows
+    (prefix/pen/minutes) and each row's current token index.
+    Returns the same tuple object while nothing visible changed.
+    """
+    global _inputs, _inputs_rows, _inputs_idx
+    idx = (now_ms // CTA_TOGGLE_MS)
+    if _inputs is not None and cta_rows_data is _inputs_rows and idx == _inputs_idx:
+        return _inputs
+    sel = tuple(idx % len(row[ROW_MINUTES]) for row in cta_rows_data)
+    if _inputs is None or cta_rows_data is not _inputs_rows or sel != _inputs[1]:
+        _inputs = (cta_rows_data, sel)
+    _inputs_rows, _inputs_idx = cta_rows_data, idx
+    return _inputs
+
+
+def draw_cta_toggle(cta_rows_data, now_ms, x_offset=0, clear_first=True, page=0):
     """
-    cta_rows_data: list of {"prefix": str, "pen": pen, "minutes": [tokens]}
+    cta_rows_data: list of make_row() records
     now_ms: ticks_ms() value for selecting which token to display
     x_offset: optional horizontal shift (for slide transition)
+    page: which ROWS_PER_PAGE rows to draw
+    Draws into the current display target; the caller pushes the frame.
     """
     if clear_first:
         clear()
     y = 2
     idx = (now_ms // CTA_TOGGLE_MS)
-    for row in cta_rows_data:
-        minutes = row["minutes"]
-        tok = token3(minutes[idx % len(minutes)])  # fixed 3-char field
+    first = page * ROWS_PER_PAGE
+    for i in range(first, min(first + ROWS_PER_PAGE, len(cta_rows_data))):
+        row = cta_rows_data[i]
+        tokens = row[ROW_TOKENS]
+        tok = tokens[idx % len(tokens)]  # fixed 3-char field
 
         tok_w = text_width(tok, TEXT_SCALE)
         tok_x = DISPLAY_WIDTH - tok_w + x_offset
         left_max_w = DISPLAY_WIDTH - tok_w - 1
 
-        prefix = row["prefix"]
-        # Trim prefix to fit the left column
-        while text_width(prefix, TEXT_SCALE) > left_max_w and len(prefix) > 0:
-            prefix = prefix[:-1]
+        # Trim prefix to fit the left column (cached per prefix/width)
+        prefix = fit_text(row[ROW_PREFIX], left_max_w, TEXT_SCALE)
 
-        draw_text(prefix, 0 + x_offset, y, TEXT_SCALE, row["pen"], left_max_w)
-        draw_text(tok, tok_x, y, TEXT_SCALE, row["pen"])
+        draw_text(prefix, 0 + x_offset, y, TEXT_SCALE, row[ROW_PEN], left_max_w)
+        draw_text(tok, tok_x, y, TEXT_SCALE, row[ROW_PEN])
+        if row[ROW_STALE]:
+            # Stale marker in the gap above the token
+            draw_pixel(DISPLAY_WIDTH - 1 + x_offset, y - 1, make_pen(STALE_DOT_RGB))
         y += LINE_HEIGHT
-
-    update()
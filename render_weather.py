@@ -2,39 +2,67 @@
 # Weather screen: shows local time (24h), current temp (°F) colorized,
 # and either today's hi/lo or the condition text.
 
-import time
-from display import clear, draw_text, update, center_x, make_pen, draw_text_with_shadow
-from theme import temp_to_color_f
-from config import LINE_HEIGHT, TEXT_SCALE, CLOCK_TEXT_SCALE
+import clock
+from display import clear, draw_text, draw_pixel, center_x, make_pen, draw_text_with_shadow
+from theme import temp_pen_f
+from config import LINE_HEIGHT, TEXT_SCALE, CLOCK_TEXT_SCALE, DISPLAY_WIDTH, STALE_DOT_RGB
 
+# Last inputs tuple and the raw values it was built from; strings are only
+# re-formatted when one of these changes.
+_inputs = None
+_src = [None] * 8  # clock, temp_f, tmax, tmin, cond, time_pen, hl_pen, stale
 
-def _format_clock_local(tz_offset_seconds):
-    secs = time.time() + (tz_offset_seconds or 0)
-    tm = time.gmtime(secs)
-    return "{:02d}:{:02d}".format(tm[3], tm[4])  # 24h HH:MM
 
-
-def draw_weather_static(time_pen, hl_pen, tz_offset_seconds, wx, x_offset=0, clear_first=True):
+def weather_inputs(time_pen, hl_pen, tz_offset_seconds, wx):
     """
-    time_pen: PicoGraphics pen for the clock (theme TIME color)
-    hl_pen:   PicoGraphics pen for highlight (theme HL color)
-    tz_offset_seconds: int (local offset from UTC)
-    wx: dict with keys: temp_f, tmax, tmin, cond
-    x_offset: horizontal shift in pixels (for slide transitions)
-    clear_first: whether to clear the screen before drawing
+    Everything visible on the weather screen, as a comparable tuple:
+    (clock, temp, hi/lo-or-condition, time_pen, temp_pen, hl_pen, stale).
+    Used as the frame fingerprint and passed back to draw_weather_static.
+    Returns the same tuple object while nothing visible changed.
     """
-    line1 = _format_clock_local(tz_offset_seconds)
-
+    global _inputs
+    line1 = clock.hhmm(tz_offset_seconds)
     temp_f = wx.get("temp_f")
-    line2 = f"{int(temp_f)}°F" if temp_f is not None else "--°F"
-
     tmax, tmin = wx.get("tmax"), wx.get("tmin")
+    cond = wx.get("cond")
+    stale = bool(wx.get("stale"))
+
+    s = _src
+    if (_inputs is not None and s[0] is line1 and s[1] == temp_f and s[2] == tmax
+            and s[3] == tmin and s[4] == cond and s[5] == time_pen and s[6] == hl_pen
+            and s[7] == stale):
+        return _inputs
+
+    line2 = f"{int(temp_f)}°F" if temp_f is not None else "--°F"
     line3 = (
         f"{int(tmax)}°/{int(tmin)}°"
         if (tmax is not None and tmin is not None)
-        else (wx.get("cond") or "-")
+        else (cond or "-")
     )
 
+    # Temp color follows the temperature (precomputed per integer °F)
+    temp_pen = temp_pen_f(temp_f, make_pen)
+    _inputs = (line1, line2, line3, time_pen, temp_pen, hl_pen, stale)
+    s[0], s[1], s[2], s[3] = line1, temp_f, tmax, tmin
+    s[4], s[5], s[6], s[7] = cond, time_pen, hl_pen, stale
+    return _inputs
+
+
+def draw_weather_static(time_pen, hl_pen, tz_offset_seconds, wx, x_offset=0, clear_first=True, inputs=None):
+    """
+    time_pen: PicoGraphics pen for the clock (theme TIME color)
+    hl_pen:   PicoGraphics pen for highlight (theme HL color)
+    tz_offset_seconds: int (local offset from UTC)
+    wx: dict with keys: temp_f, tmax, tmin, cond, stale
+    x_offset: horizontal shift in pixels (for slide transitions)
+    clear_first: whether to clear the screen before drawing
+    inputs: precomputed weather_inputs(...) for this frame, if the caller has it
+    Draws into the current display target; the caller pushes the frame.
+    """
+    if inputs is None:
+        inputs = weather_inputs(time_pen, hl_pen, tz_offset_seconds, wx)
+    line1, line2, line3, time_pen, temp_pen, hl_pen, stale = inputs
+
     y1, y2, y3 = 3, 3 + LINE_HEIGHT, 3 + 2 * LINE_HEIGHT
 
     if clear_first:
@@ -42,10 +70,10 @@ def draw_weather_static(time_pen, hl_pen, tz_offset_seconds, wx, x_offset=0, cle
     # Clock
     draw_text(line1, center_x(line1, CLOCK_TEXT_SCALE) + x_offset, y1, CLOCK_TEXT_SCALE, time_pen)
     # Temp (colorized by temp)
-    temp_rgb = temp_to_color_f(temp_f)
-    draw_text(line2, center_x(line2, TEXT_SCALE) + x_offset, y2, TEXT_SCALE, make_pen(temp_rgb))
+    draw_text(line2, center_x(line2, TEXT_SCALE) + x_offset, y2, TEXT_SCALE, temp_pen)
     # Hi/Lo or condition
     draw_text(line3, center_x(line3, TEXT_SCALE) + x_offset, y3, TEXT_SCALE, hl_pen)
-
-    update()
+    if stale:
+        # Last refresh failed: values are from an older fetch
+        draw_pixel(DISPLAY_WIDTH - 1 + x_offset, 0, make_pen(STALE_DOT_RGB))
 
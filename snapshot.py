@@ -0,0 +1,70 @@
+# snapshot.py
+# Last known data on flash, for a warm boot: the app saves weather, CTA
+# arrivals (as absolute epoch seconds) and the tz offset after good polls, and
+# loads them at boot so the first frame shows real (stale-marked) data before
+# Wi-Fi is even up. Writes go to a temp file renamed over the old snapshot,
+# so a reset mid-write never leaves a torn file, and are rate-limited to
+# SNAPSHOT_MIN_INTERVAL_MS to spare the flash.
+
+import json
+import os
+import time
+
+from config import SNAPSHOT_PATH, SNAPSHOT_MIN_INTERVAL_MS
+
+VERSION = 1
+
+_last_write_ms = None
+
+# Metrics (see stats())
+writes = 0
+write_bytes = 0
+write_ms_max = 0
+
+
+def due(now_ms):
+    """True if a save now would not exceed the write rate limit."""
+    return _last_write_ms is None or \
+        time.ticks_diff(now_ms, _last_write_ms) >= SNAPSHOT_MIN_INTERVAL_MS
+
+
+def save(state, now_ms):
+    """
+    Write state (a JSON-able dict) atomically; returns True if written.
+    Callers check due() first so they only build state when it will be saved.
+    """
+    global _last_write_ms, writes, write_bytes, write_ms_max
+    _last_write_ms = now_ms
+    state["v"] = VERSION
+    tmp = SNAPSHOT_PATH + ".tmp"
+    t0 = time.ticks_ms()
+    try:
+        data = json.dumps(state)
+        with open(tmp, "w") as f:
+            f.write(data)
+        os.rename(tmp, SNAPSHOT_PATH)
+    except Exception as e:
+        print("snapshot write failed:", e)
+        return False
+    ms = time.ticks_diff(time.ticks_ms(), t0)
+    writes += 1
+    write_bytes += len(data)
+    if ms > write_ms_max:
+        write_ms_max = ms
+    return True
+
+
+def load():
+    """The saved state dict, or None if missing, unreadable or from another version."""
+    try:
+        with open(SNAPSHOT_PATH) as f:
+            state = json.load(f)
+    except Exception:
+        return None
+    if not isinstance(state, dict) or state.get("v") != VERSION:
+        return None
+    return state
+
+
+def stats():
+    return {"writes": writes, "bytes": write_bytes, "write_ms_max": write_ms_max}
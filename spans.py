@@ -0,0 +1,115 @@
+# spans.py
+# Named timing spans around the main loop stages and network calls.
+# Each sample (span id, microseconds) goes into a fixed-size ring buffer of
+# preallocated arrays, so recording one allocates nothing. summary()/dump()
+# give per-span min, p50/p90/p99 and max over the ring (a rolling window of
+# the last SPAN_RING_SIZE samples), plus the all-time max and sample count.
+# With PROFILE_SPANS off, start()/stop() are bound to a no-op and timed()
+# hands the awaitable back unchanged, so an instrumented call site costs one
+# trivial call.
+#
+# On the device: Ctrl-C the app on the serial REPL, then
+#   import spans; spans.dump()
+# (module state survives the interrupt). Also printed with the periodic stats.
+
+import time
+from array import array
+
+from config import PROFILE_SPANS, SPAN_RING_SIZE
+
+ENABLED = PROFILE_SPANS
+MAX_SPANS = 32
+
+names = []                                # span id -> name
+
+_ids = bytearray(SPAN_RING_SIZE)          # ring: span id per sample
+_us = array("L", [0] * SPAN_RING_SIZE)    # ring: duration per sample
+_pos = 0
+_filled = 0
+_count = array("L", [0] * MAX_SPANS)      # samples ever recorded, per span
+_peak = array("L", [0] * MAX_SPANS)       # all-time max, per span
+
+
+def span(name):
+    """Id for a span name; register once at import time, not per call."""
+    if name in names:
+        return names.index(name)
+    if len(names) >= MAX_SPANS:
+        raise ValueError("too many spans")
+    names.append(name)
+    return len(names) - 1
+
+
+def _start():
+    return time.ticks_us()
+
+
+def _stop(sid, t0):
+    global _pos, _filled
+    d = time.ticks_diff(time.ticks_us(), t0)
+    i = _pos
+    _ids[i] = sid
+    _us[i] = d
+    _pos = i + 1 if i + 1 < SPAN_RING_SIZE else 0
+    if _filled < SPAN_RING_SIZE:
+        _filled += 1
+    _count[sid] += 1
+    if d > _peak[sid]:
+        _peak[sid] = d
+
+
+async def _timed(sid, aw):
+    # Wall time, including time other tasks ran while this one waited
+    t0 = time.ticks_us()
+    try:
+        return await aw
+    finally:
+        _stop(sid, t0)
+
+
+def _off(*args):
+    return 0
+
+
+def _untimed(sid, aw):
+    return aw
+
+
+# t = spans.start(); ...; spans.stop(SPAN_ID, t)  /  await spans.timed(SPAN_ID, aw)
+if ENABLED:
+    start, stop, timed = _start, _stop, _timed
+else:
+    start, stop, timed = _off, _off, _untimed
+
+
+def summary():
+    """
+    name -> (samples in window, min, p50, p90, p99, max, all-time max,
+    samples ever), durations in microseconds. Allocates; call it on demand.
+    """
+    out = {}
+    for sid, name in enumerate(names):
+        v = sorted(_us[i] for i in range(_filled) if _ids[i] == sid)
+        if not v:
+            continue
+        n = len(v)
+        out[name] = (n, v[0], v[n // 2], v[n * 9 // 10], v[n * 99 // 100], v[-1],
+                     _peak[sid], _count[sid])
+    return out
+
+
+def dump():
+    if not ENABLED:
+        print("spans: disabled (PROFILE_SPANS = False)")
+        return
+    print("span us: n min p50 p90 p99 max | peak count")
+    for name, s in summary().items():
+        print(" ", name, s[0], s[1], s[2], s[3], s[4], s[5], "|", s[6], s[7])
+
+
+def reset():
+    global _pos, _filled
+    _pos = _filled = 0
+    for sid in range(MAX_SPANS):
+        _count[sid] = 0
+        _peak[sid] = 0
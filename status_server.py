@@ -0,0 +1,144 @@
+# status_server.py
+# Tiny status HTTP server for headless panels, run as an asyncio task next to
+# the render task:
+#   GET /status   compact JSON, one key per section
+#   GET /metrics  Prometheus text (numeric fields only; nested dicts and
+#                 lists become labels)
+# The app passes an async snapshot() returning {section: small dict} (built
+# with yields between sections, and across cores in worker mode) and the
+# section order. A scrape is sent one section at a time with a yield in
+# between and drain() after each write, so it never holds the event loop for
+# a frame.
+# One scrape at a time: a second concurrent client gets a 503.
+
+import json
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+from config import STATUS_PORT, STATUS_READ_TIMEOUT_MS
+
+_PREFIX = "cosmic_"
+_snapshot = None
+_order = ()
+_busy = False
+
+# Counters (see stats())
+scrapes = 0
+rejected = 0
+
+
+async def serve(snapshot, order, port=STATUS_PORT):
+    """Serve await snapshot() sections, in order, until cancelled."""
+    global _snapshot, _order
+    _snapshot, _order = snapshot, order
+    server = await asyncio.start_server(_client, "0.0.0.0", port)
+    print("status server on port", port)
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+async def _read_request(reader):
+    # Request line only; headers are read and ignored
+    line = await reader.readline()
+    while True:
+        h = await reader.readline()
+        if not h or h == b"\r\n" or h == b"\n":
+            break
+    parts = line.split()
+    return parts[1] if len(parts) > 1 else b""
+
+
+async def _client(reader, writer):
+    global _busy, scrapes, rejected
+    try:
+        if _busy:
+            rejected += 1
+            writer.write(b"HTTP/1.0 503 Busy\r\nConnection: close\r\n\r\n")
+            await writer.drain()
+            return
+        _busy = True
+        try:
+            path = await asyncio.wait_for(_read_request(reader), STATUS_READ_TIMEOUT_MS / 1000)
+            if path.startswith(b"/metrics"):
+                await _send(writer, b"text/plain; version=0.0.4", _prometheus)
+            elif path in (b"/", b"/status") or path.startswith(b"/status?"):
+                await _send(writer, b"application/json", _json)
+            else:
+                writer.write(b"HTTP/1.0 404 Not Found\r\nConnection: close\r\n\r\n")
+                await writer.drain()
+                return
+            scrapes += 1
+        finally:
+            _busy = False
+    except Exception:
+        pass
+    finally:
+        try:
+            writer.close()
+            await writer.wait_closed()
+        except Exception:
+            pass
+
+
+async def _send(writer, ctype, fmt):
+    sections = await _snapshot()
+    writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: " + ctype +
+                 b"\r\nCache-Control: no-store\r\nConnection: close\r\n\r\n")
+    first = True
+    for name in _order:
+        await asyncio.sleep(0)  # let a due frame run before each section
+        writer.write(fmt(name, sections.get(name, {}), first).encode())
+        await writer.drain()
+        first = False
+    tail = fmt(None, None, first)
+    if tail:
+        writer.write(tail.encode())
+        await writer.drain()
+
+
+def _dumps(v):
+    try:
+        return json.dumps(v, separators=(",", ":"))
+    except TypeError:  # older MicroPython: no separators argument
+        return json.dumps(v)
+
+
+def _json(name, data, first):
+    # Streamed as one object; name None closes it
+    if name is None:
+        return "{}" if first else "}"
+    return ("{" if first else ",") + _dumps(name) + ":" + _dumps(data)
+
+
+def _prometheus(name, data, first):
+    if name is None:
+        return ""
+    out = []
+    for key, v in data.items():
+        _metric(out, _PREFIX + name + "_" + key, "", v)
+    return "".join(out)
+
+
+def _metric(out, metric, labels, v):
+    if isinstance(v, bool):
+        v = int(v)
+    if isinstance(v, (int, float)):
+        out.append("%s%s %s\n" % (metric, "{" + labels + "}" if labels else "", v))
+    elif isinstance(v, dict) and not labels:
+        for k, sub in v.items():
+            _metric(out, metric, 'key="%s"' % k, sub)
+    elif isinstance(v, (list, tuple)) and not labels:
+        for i, sub in enumerate(v):
+            _metric(out, metric, 'i="%d"' % i, sub)
+    # strings, None and deeper nesting are JSON-only
+
+
+def stats():
+    return {"scrapes": scrapes, "rejected": rejected}
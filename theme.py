@@ -3,25 +3,32 @@
 # - Open-Meteo fields: sunrise, sunset, is_day
 # - Local time (via tz offset)
 # Also provides a temperature→RGB helper for the weather number.
+#
+# The day is precomputed into a timeline whenever sunrise/sunset change:
+# one blend step per local minute (night -> day ramp across sunrise, back
+# across sunset), and per step its pens and brightness. A theme check is then
+# a table lookup. Outside the ramps, Open-Meteo's is_day = 1 still wins over
+# a flat-night minute (e.g. sunrise/sunset from a stale day).
 
 import time
-from config import THEMES, DUSK_WINDOW_MIN, THEME_CHECK_MS
+from config import THEMES, DUSK_WINDOW_MIN, THEME_CHECK_MS, THEME_BLEND_STEPS
+
+MINUTES_PER_DAY = 1440
 
 # Runtime state (updated by update_theme / set_tz_offset)
 _tz_offset_seconds = 0
-_current_theme = None
-_last_theme_check_ms = 0
+_last_theme_check_ms = 0
+
+# Timeline: local minute -> blend step (0 = night .. THEME_BLEND_STEPS = day,
+# or _FLAT_NIGHT outside the ramps), and step -> (TIME_PEN, HL_PEN,
+# brightness), pens from the shared registry
+_FLAT_NIGHT = 0x80
+_timeline = bytearray(MINUTES_PER_DAY)
+_steps = []
+_timeline_key = None  # (sunrise, sunset) the timeline was built for
 
-# Cached RGB + brightness
-TIME_RGB = THEMES["day"]["time"]
-HL_RGB   = THEMES["day"]["hl"]
-_base_brightness = THEMES["day"].get("brightness", 0.5)
-
-# Cached pens to avoid re-creating every frame
-_TIME_PEN = None
-_HL_PEN = None
-_last_time_rgb = None
-_last_hl_rgb = None
+_base_brightness = THEMES["day"].get("brightness", 0.5)
+_result = (None, None, _base_brightness)  # update_theme() return value, one of _steps
 
 
 def set_tz_offset(sec):
@@ -41,22 +48,12 @@ def _clamp(v, a, b):
     return a if v < a else b if v > b else v
 
 
-def _mix_rgb(c1, c2, t):
+def _mix_rgb(c1, c2, t):
     t = _clamp(t, 0.0, 1.0)
     r = int(c1[0] + (c2[0] - c1[0]) * t)
     g = int(c1[1] + (c2[1] - c1[1]) * t)
     b = int(c1[2] + (c2[2] - c1[2]) * t)
-    return (_clamp(r, 0, 255), _clamp(g, 0, 255), _clamp(b, 0, 255))
-
-
-def _ensure_pens(make_pen_func):
-    global _TIME_PEN, _HL_PEN, _last_time_rgb, _last_hl_rgb
-    if _TIME_PEN is None or _last_time_rgb != TIME_RGB:
-        _TIME_PEN = make_pen_func(TIME_RGB)
-        _last_time_rgb = TIME_RGB
-    if _HL_PEN is None or _last_hl_rgb != HL_RGB:
-        _HL_PEN = make_pen_func(HL_RGB)
-        _last_hl_rgb = HL_RGB
+    return (_clamp(r, 0, 255), _clamp(g, 0, 255), _clamp(b, 0, 255))
 
 
 def temp_to_color_f(temp_f, white=(180, 180, 180)):
@@ -86,6 +83,49 @@ def temp_to_color_f(temp_f, white=(180, 180, 180)):
     return (_clamp(r, 0, 255), _clamp(g, 0, 255), _clamp(b, 0, 255))
 
 
+# Integer °F -> temp palette index, precomputed from temp_to_color_f so the
+# weather screen needs no gradient math or new pens per frame.
+TEMP_LUT_MIN_F = -10
+TEMP_LUT_MAX_F = 110
+_TEMP_PALETTE = []   # unique RGB tuples
+_TEMP_LUT = bytearray(TEMP_LUT_MAX_F - TEMP_LUT_MIN_F + 1)
+_temp_pens = []      # palette index -> pen (filled lazily)
+_temp_none_pen = None
+
+
+def _build_temp_lut():
+    for f in range(TEMP_LUT_MIN_F, TEMP_LUT_MAX_F + 1):
+        rgb = temp_to_color_f(f)
+        try:
+            i = _TEMP_PALETTE.index(rgb)
+        except ValueError:
+            i = len(_TEMP_PALETTE)
+            _TEMP_PALETTE.append(rgb)
+        _TEMP_LUT[f - TEMP_LUT_MIN_F] = i
+    _temp_pens.extend([None] * len(_TEMP_PALETTE))
+
+
+_build_temp_lut()
+
+
+def temp_pen_f(temp_f, make_pen):
+    """
+    Pen for a temperature via the integer-°F lookup table (matches the
+    truncated value shown on screen). Pens are created once per palette entry.
+    """
+    global _temp_none_pen
+    if temp_f is None:
+        if _temp_none_pen is None:
+            _temp_none_pen = make_pen(temp_to_color_f(None))
+        return _temp_none_pen
+    f = _clamp(int(temp_f), TEMP_LUT_MIN_F, TEMP_LUT_MAX_F)
+    i = _TEMP_LUT[f - TEMP_LUT_MIN_F]
+    p = _temp_pens[i]
+    if p is None:
+        p = _temp_pens[i] = make_pen(_TEMP_PALETTE[i])
+    return p
+
+
 def _hhmm_from_iso(local_iso):
     # Expect "YYYY-MM-DDTHH:MM"
     if not local_iso or len(local_iso) < 16:
@@ -102,15 +142,53 @@ def _minutes(h, m):
     return h * 60 + m
 
 
-def _blend_factor(now_min, edge_min):
+def _wrap(delta_min):
+    """Signed minute difference folded into -720..719 (across midnight)."""
+    return (delta_min + 720) % MINUTES_PER_DAY - 720
+
+
+def _step_at(now_min, sr_min, ss_min):
     """
-    Returns None outside the dusk/dawn window, else a 0..1 factor
-    that peaks at the edge time and fades outward across DUSK_WINDOW_MIN.
+    Blend step for a local minute: ramps night -> day over DUSK_WINDOW_MIN
+    either side of sunrise and day -> night around sunset, flat in between
+    (_FLAT_NIGHT for night, so update_theme can apply is_day there).
     """
-    delta = abs(now_min - edge_min)
-    if delta >= DUSK_WINDOW_MIN:
-        return None
-    return 1.0 - (delta / float(DUSK_WINDOW_MIN))
+    n = THEME_BLEND_STEPS
+    w = DUSK_WINDOW_MIN
+    d = _wrap(now_min - sr_min)
+    if -w < d < w:
+        return int((d + w) * n / (2 * w) + 0.5)
+    d = _wrap(now_min - ss_min)
+    if -w < d < w:
+        return n - int((d + w) * n / (2 * w) + 0.5)
+    day_len = (ss_min - sr_min) % MINUTES_PER_DAY
+    return n if (now_min - sr_min) % MINUTES_PER_DAY < day_len else _FLAT_NIGHT
+
+
+def _build_timeline(wx, make_pen):
+    """Fill _timeline and _steps for the sunrise/sunset in wx (07:00/19:00 if missing)."""
+    global _steps
+    sr = _hhmm_from_iso(wx.get("sunrise"))
+    ss = _hhmm_from_iso(wx.get("sunset"))
+    sr_min = _minutes(sr[0], sr[1]) if sr else 7 * 60
+    ss_min = _minutes(ss[0], ss[1]) if ss else 19 * 60
+    for m in range(MINUTES_PER_DAY):
+        _timeline[m] = _step_at(m, sr_min, ss_min)
+
+    day_cfg = THEMES["day"]
+    night_cfg = THEMES["night"]
+    b_day = day_cfg.get("brightness", 0.5)
+    b_night = night_cfg.get("brightness", 0.5)
+    n = THEME_BLEND_STEPS
+    steps = []
+    for s in range(n + 1):
+        k = s / n
+        steps.append((
+            make_pen(_mix_rgb(night_cfg["time"], day_cfg["time"], k)),
+            make_pen(_mix_rgb(night_cfg["hl"], day_cfg["hl"], k)),
+            b_night + (b_day - b_night) * k,
+        ))
+    _steps = steps
 
 
 # -----------------------
@@ -119,7 +197,8 @@ def _blend_factor(now_min, edge_min):
 
 def update_theme(wx, make_pen, force=False):
     """
-    Compute and cache theme pens + brightness.
+    Look up theme pens + brightness for the current local minute, rebuilding
+    the day's timeline first if sunrise/sunset changed.
     Args:
       wx: dict with keys {sunrise, sunset, is_day}
       make_pen: function(rgb_tuple) -> PicoGraphics pen
@@ -127,68 +206,31 @@ def update_theme(wx, make_pen, force=False):
     Returns:
       (TIME_PEN, HL_PEN, base_brightness_float)
     """
-    global _current_theme, _last_theme_check_ms, TIME_RGB, HL_RGB, _base_brightness
+    global _last_theme_check_ms, _timeline_key, _result, _base_brightness
 
     now_ms = time.ticks_ms()
-    if not force and time.ticks_diff(now_ms, _last_theme_check_ms) < THEME_CHECK_MS:
-        _ensure_pens(make_pen)
-        return (_TIME_PEN, _HL_PEN, _base_brightness)
+    if not force and _steps and time.ticks_diff(now_ms, _last_theme_check_ms) < THEME_CHECK_MS:
+        return _result
     _last_theme_check_ms = now_ms
 
-    # Local time
-    y, m, d, hh, mm, *_ = _local_now_tuple()
-    now_min = _minutes(hh, mm)
+    key = (wx.get("sunrise"), wx.get("sunset"))
+    if key != _timeline_key or not _steps:
+        _build_timeline(wx, make_pen)
+        _timeline_key = key
 
-    # Sunrise/sunset minutes
-    sr = _hhmm_from_iso(wx.get("sunrise"))
-    ss = _hhmm_from_iso(wx.get("sunset"))
-    sr_min = _minutes(sr[0], sr[1]) if sr else None
-    ss_min = _minutes(ss[0], ss[1]) if ss else None
+    t = _local_now_tuple()
+    step = _timeline[_minutes(t[3], t[4])]
+    if step == _FLAT_NIGHT:
+        # Outside the ramps: is_day from the API, if it says day, wins
+        step = THEME_BLEND_STEPS if wx.get("is_day") == 1 else 0
+    _result = _steps[step]
+    _base_brightness = _result[2]
+    return _result
 
-    day_cfg = THEMES["day"]
-    night_cfg = THEMES["night"]
 
-    # Prefer is_day if available
-    is_day_flag = wx.get("is_day")
-    base_theme = "day" if (isinstance(is_day_flag, int) and is_day_flag == 1) else None
-
-    # Blend near sunrise (night→day)
-    if sr_min is not None:
-        t = _blend_factor(now_min, sr_min)
-        if t is not None:
-            k = t
-            TIME_RGB = _mix_rgb(night_cfg["time"], day_cfg["time"], k)
-            HL_RGB   = _mix_rgb(night_cfg["hl"],   day_cfg["hl"],   k)
-            _base_brightness = night_cfg["brightness"] + (day_cfg["brightness"] - night_cfg["brightness"]) * k
-            _current_theme = "dawn"
-            _ensure_pens(make_pen)
-            return (_TIME_PEN, _HL_PEN, _base_brightness)
-
-    # Blend near sunset (day→night)
-    if ss_min is not None:
-        t = _blend_factor(now_min, ss_min)
-        if t is not None:
-            k = t
-            TIME_RGB = _mix_rgb(day_cfg["time"], night_cfg["time"], k)
-            HL_RGB   = _mix_rgb(day_cfg["hl"],   night_cfg["hl"],   k)
-            _base_brightness = day_cfg["brightness"] + (night_cfg["brightness"] - day_cfg["brightness"]) * k
-            _current_theme = "dusk"
-            _ensure_pens(make_pen)
-            return (_TIME_PEN, _HL_PEN, _base_brightness)
-
-    # Outside blend windows → snap to day/night
-    if base_theme is None and sr_min is not None and ss_min is not None:
-        base_theme = "day" if (sr_min <= now_min < ss_min) else "night"
-    if base_theme is None:
-        base_theme = "day" if (7 <= hh < 19) else "night"  # conservative fallback
-
-    cfg = day_cfg if base_theme == "day" else night_cfg
-    TIME_RGB, HL_RGB = cfg["time"], cfg["hl"]
-    _base_brightness = cfg.get("brightness", 0.5)
-    _current_theme = base_theme
-
-    _ensure_pens(make_pen)
-    return (_TIME_PEN, _HL_PEN, _base_brightness)
+def ms_until_check():
+    """Milliseconds until update_theme() will recompute (0 if due)."""
+    return max(0, THEME_CHECK_MS - time.ticks_diff(time.ticks_ms(), _last_theme_check_ms))
 
 
 def base_brightness():
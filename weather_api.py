@@ -1,16 +1,36 @@
 # weather_api.py
 # Open-Meteo client: current temp/condition, daily hi/lo, sunrise/sunset, tz offset.
 
-import urequests as requests
-import gc
+import http_client
+import heap
+import jsonstream
+from data_cache import NOT_MODIFIED
+from config import HTTP_STREAM_JSON, HTTP_CHUNK_SIZE, WEATHER_POLL_SECONDS, HTTP_KEEPALIVE_SLACK_MS
 
-_DEF_HEADERS = {"Connection": "close"}
 _BASE = "https://api.open-meteo.com/v1/forecast"
+# Keep the TLS connection across the poll interval, so the next poll can reuse it
+http_client.keep_idle(_BASE, WEATHER_POLL_SECONDS * 1000 + HTTP_KEEPALIVE_SLACK_MS)
 
+# Response fields we keep; everything else is skipped while streaming
+_P_OFFSET = ("utc_offset_seconds",)
+_P_TEMP = ("current", "temperature_2m")
+_P_CODE = ("current", "weather_code")
+_P_IS_DAY = ("current", "is_day")
+_P_TMAX = ("daily", "temperature_2m_max", 0)
+_P_TMIN = ("daily", "temperature_2m_min", 0)
+_P_SUNRISE = ("daily", "sunrise", 0)
+_P_SUNSET = ("daily", "sunset", 0)
+_PATHS = (_P_OFFSET, _P_TEMP, _P_CODE, _P_IS_DAY, _P_TMAX, _P_TMIN, _P_SUNRISE, _P_SUNSET)
 
-def fetch_weather(lat, lon, tz):
+stats = http_client.ApiStats()  # fetch success/latency (304s count as success)
+
+
+async def fetch_weather(lat, lon, tz, cache=None):
     """
-    Returns dict:
+    cache: optional data_cache.Entry; its validators make this a conditional
+    GET, and NOT_MODIFIED is returned if the server answers 304.
+
+    Returns None on failure, or dict:
       {
         "tz_offset_seconds": int,
         "temp_f": float|None,
@@ -22,47 +42,49 @@ def fetch_weather(lat, lon, tz):
         "sunset":  "YYYY-MM-DDTHH:MM"|None,
       }
     """
+    return await stats.timed(heap.measure("weather", _fetch_weather(lat, lon, tz, cache)))
+
+
+async def _fetch_weather(lat, lon, tz, cache):
     url = (
         f"{_BASE}?latitude={lat}&longitude={lon}"
         "&current=temperature_2m,weather_code,is_day"
         "&daily=temperature_2m_max,temperature_2m_min,sunrise,sunset"
+        "&forecast_days=1"
         "&temperature_unit=fahrenheit"
         f"&timezone={tz}"
     )
     resp = None
     try:
-        resp = requests.get(url, headers=_DEF_HEADERS)
-        data = resp.json()
+        resp = await http_client.get(url, cache.request_headers() if cache else None)
+        if resp.status == 304:
+            return NOT_MODIFIED
+        ex = await jsonstream.read_json(resp, _PATHS, stream=HTTP_STREAM_JSON,
+                                        chunk_size=HTTP_CHUNK_SIZE)
     except Exception:
-        _cleanup(resp)
         return None
     finally:
-        _cleanup(resp)
+        await _cleanup(resp)
+    if not ex.done:
+        return None  # truncated body
+    if cache is not None:
+        cache.store_validators(resp.headers)
 
+    v = ex.values
     try:
-        tz_offset_seconds = int(data.get("utc_offset_seconds", 0))
+        tz_offset_seconds = int(v.get(_P_OFFSET, 0))
     except Exception:
         tz_offset_seconds = 0
 
-    cur = data.get("current", {}) or {}
-    daily = data.get("daily", {}) or {}
-
-    def _first(lst):
-        try:
-            return lst[0]
-        except Exception:
-            return None
-
-    code = cur.get("weather_code")
     return {
         "tz_offset_seconds": tz_offset_seconds,
-        "temp_f": cur.get("temperature_2m"),
-        "cond": weather_code_to_text(code),
-        "tmax": _first(daily.get("temperature_2m_max", [None])),
-        "tmin": _first(daily.get("temperature_2m_min", [None])),
-        "is_day": cur.get("is_day"),
-        "sunrise": _first(daily.get("sunrise", [None])),
-        "sunset": _first(daily.get("sunset", [None])),
+        "temp_f": v.get(_P_TEMP),
+        "cond": weather_code_to_text(v.get(_P_CODE)),
+        "tmax": v.get(_P_TMAX),
+        "tmin": v.get(_P_TMIN),
+        "is_day": v.get(_P_IS_DAY),
+        "sunrise": v.get(_P_SUNRISE),
+        "sunset": v.get(_P_SUNSET),
     }
 
 
@@ -88,10 +110,11 @@ def weather_code_to_text(code):
     return "Weather"
 
 
-def _cleanup(resp):
+async def _cleanup(resp):
+    # Hands the connection back to the keep-alive pool when it is reusable
     try:
         if resp:
-            resp.close()
+            await resp.aclose()
     except Exception:
         pass
-    gc.collect()
+    heap.maybe_collect()